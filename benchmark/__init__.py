@@ -0,0 +1,17 @@
+"""
+Runner compartido del benchmark energético TPC-H sobre MongoDB sharded
+"""
+from .cache import CacheNotCold
+from .indexes import IndexMismatch
+from .query import Query
+from .queries import SCHEMAS, get_queries
+from .runner import Runner, TimeoutException
+from .sampler import Sampler
+from .writer import ArrowWriter, BufferedWriter, CsvWriter
+from .script import run_script
+
+__all__ = [
+    "ArrowWriter", "BufferedWriter", "CacheNotCold", "CsvWriter", "IndexMismatch", "Query",
+    "Runner", "SCHEMAS", "Sampler", "TimeoutException",
+    "get_queries", "run_script",
+]
@@ -0,0 +1,68 @@
+"""
+Ejecuta varias queries TPC-H seguidas en un solo proceso:
+
+    python -m benchmark sin_diseno                # Q1..Q22
+    python -m benchmark indices Q6 Q8 -n 10
+
+Si una ejecución se corta, relanzarla continúa desde el último checkpoint
+(--fresh para empezar de cero).
+"""
+import argparse
+import os
+
+from .config import INDEX_PROFILES, ITERATIONS, LOOKUP_STRATEGY, OUTPUT_FORMATS, PREWARM
+from .indexes import PROFILES
+from .lookups import STRATEGIES
+from .prewarm import STAGES
+from .writer import EXTENSIONS
+from .queries import SCHEMAS, get_queries
+from .runner import Runner
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmark", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("schema", choices=sorted(SCHEMAS))
+    parser.add_argument("queries", nargs="*", help="Q1 Q6 ... (por defecto todas)")
+    parser.add_argument("-n", "--iterations", type=int, default=ITERATIONS)
+    parser.add_argument("-o", "--output-dir",
+                        help="por defecto la carpeta del esquema en el repo")
+    parser.add_argument("-f", "--format", action="append", choices=sorted(EXTENSIONS),
+                        help=f"formato de salida, repetible (por defecto {', '.join(OUTPUT_FORMATS)})")
+    parser.add_argument("--prewarm", action="append", choices=STAGES + ("none",),
+                        help="etapa de precalentamiento de las queries en caliente, repetible "
+                             f"(por defecto {', '.join(PREWARM) or 'none'})")
+    parser.add_argument("--indexes", metavar="PERFIL",
+                        help="perfil de índices a construir y verificar antes de empezar "
+                             "(ver python -m benchmark.indexes list)")
+    parser.add_argument("--lookups", choices=STRATEGIES, default=LOOKUP_STRATEGY,
+                        help="$lookup correlacionados tal cual o reescritos para usar índices "
+                             f"(por defecto {LOOKUP_STRATEGY})")
+    parser.add_argument("--fresh", action="store_true",
+                        help="ignora checkpoints previos y empieza de cero")
+    args = parser.parse_args(argv)
+    if args.indexes and args.indexes not in PROFILES[args.schema]:
+        parser.error(f"perfil de índices desconocido para {args.schema}: {args.indexes} "
+                     f"(hay {', '.join(PROFILES[args.schema])})")
+
+    folder, _ = SCHEMAS[args.schema]
+    output_dir = args.output_dir or os.path.join(REPO_ROOT, folder)
+    queries = get_queries(args.schema, args.queries)
+
+    stages = PREWARM if args.prewarm is None else [s for s in args.prewarm if s != "none"]
+    index_profiles = dict(INDEX_PROFILES)
+    if args.indexes:
+        index_profiles[args.schema] = args.indexes
+    runner = Runner(formats=args.format or OUTPUT_FORMATS, prewarm_stages=stages,
+                    index_profiles=index_profiles, lookup_strategy=args.lookups)
+    try:
+        runner.ping()
+        runner.run_suite(queries, output_dir, args.iterations, resume=not args.fresh)
+    finally:
+        runner.close()
+
+
+if __name__ == "__main__":
+    main()
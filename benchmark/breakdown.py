@@ -0,0 +1,89 @@
+"""
+Desglose de potencia por proceso (pid/rol) en formato columnar
+
+Cada muestra del sampler aporta una fila por proceso MongoDB y nodo. Las
+columnas se guardan en array.array (tipadas y contiguas) en lugar de una
+lista de dicts, y se vuelcan a un CSV largo al cerrar cada iteración.
+"""
+import csv
+import os
+from array import array
+
+ROLES = ("shard", "config", "mongos")
+
+PROCESS_FIELDNAMES = [
+    "query", "iteration", "sample", "elapsed_time_seconds",
+    "node", "pid", "role", "power_watts"
+]
+
+
+class ProcessPowerTable:
+
+    def __init__(self, nodes):
+        self.nodes = list(nodes)
+        self._node_index = {n: i for i, n in enumerate(self.nodes)}
+        self.clear()
+
+    def clear(self):
+        self.sample = array("I")
+        self.elapsed = array("d")
+        self.node = array("B")
+        self.pid = array("i")
+        self.role = array("B")
+        self.microwatts = array("d")
+        self._samples = 0
+
+    def __len__(self):
+        return len(self.microwatts)
+
+    def add(self, elapsed, readings):
+        """Añade una muestra ({nodo: Reading}) con una fila por proceso"""
+        idx = self._samples
+        self._samples += 1
+        for node, reading in readings.items():
+            node_id = self._node_index[node]
+            for proc in reading.processes:
+                self.sample.append(idx)
+                self.elapsed.append(elapsed)
+                self.node.append(node_id)
+                self.pid.append(proc.pid)
+                self.role.append(ROLES.index(proc.role))
+                self.microwatts.append(proc.microwatts)
+
+    def role_summary(self):
+        """
+        Potencia media (W) por (nodo, rol) en las muestras registradas:
+        qué parte se va en mongos, en los shards y en el config server.
+        """
+        if not self._samples:
+            return {}
+        totals = {}
+        for node_id, role_id, uw in zip(self.node, self.role, self.microwatts):
+            key = (self.nodes[node_id], ROLES[role_id])
+            totals[key] = totals.get(key, 0.0) + uw
+        return {key: uw / self._samples / 1_000_000 for key, uw in totals.items()}
+
+    def print_summary(self):
+        summary = self.role_summary()
+        if not summary:
+            return
+        print("  🧩 Potencia media por proceso:")
+        for (node, role), watts in sorted(summary.items()):
+            print(f"     {node:<7} {role:<7} {watts:.3f} W")
+
+    def dump_csv(self, path, query_name, iteration):
+        """Añade las filas al CSV de desglose (crea cabecera si no existe)"""
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, "a", newline="") as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(PROCESS_FIELDNAMES)
+            for i in range(len(self)):
+                writer.writerow([
+                    query_name, iteration, self.sample[i],
+                    f"{self.elapsed[i]:.3f}", self.nodes[self.node[i]],
+                    self.pid[i], ROLES[self.role[i]],
+                    f"{self.microwatts[i]/1_000_000:.6f}"
+                ])
+            f.flush()
+            os.fsync(f.fileno())
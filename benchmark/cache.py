@@ -0,0 +1,171 @@
+"""
+Limpieza de cachés para ejecuciones en frío (SO + WiredTiger)
+
+Cada nodo se trata como una tarea independiente (limpiar RAM y, si procede,
+reiniciar sus mongod) y las tres se lanzan a la vez; después se espera a que
+el cluster esté listo de verdad (ver readiness.py), sin tiempos fijos.
+
+Antes de cada iteración se mide cuánto ocupa la caché de WiredTiger en cada
+mongod, para comprobar que "en frío" lo es de verdad.
+"""
+import csv
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from pymongo import MongoClient
+
+from .config import (
+    CLEAN_RAM_SCRIPT, CLUSTER_MEMBERS, COLD_CACHE_TIMEOUT, LOCAL_HOST, LOCAL_SERVICES,
+    READY_BACKOFF_MAX, READY_POLL, REMOTE_HOSTS, REMOTE_SERVICE, SSH_USER
+)
+from .readiness import wait_until_ready
+
+HOSTS = [LOCAL_HOST] + REMOTE_HOSTS
+
+CACHE_FIELDNAMES = [
+    "query", "iteration", "node", "bytes_in_cache", "max_bytes_configured", "timestamp"
+]
+
+
+class CacheNotCold(Exception):
+    pass
+
+
+def _ssh(host, *args):
+    return ['ssh', f'{SSH_USER}@{host}', *args]
+
+
+def _command(host, *args):
+    """Comando local con sudo, o por ssh en los nodos remotos"""
+    if host == LOCAL_HOST:
+        return ['sudo', *args]
+    return _ssh(host, 'sudo', *args)
+
+
+def _services(host):
+    # Los shards remotos usan la unidad "mongod" genérica
+    return LOCAL_SERVICES if host == LOCAL_HOST else [REMOTE_SERVICE]
+
+
+def reset_host(host, restart=False):
+    """Limpia la caché del SO de un nodo y, con `restart`, reinicia sus mongod"""
+    if CLEAN_RAM_SCRIPT:
+        try:
+            subprocess.run(_command(host, CLEAN_RAM_SCRIPT),
+                           check=True, capture_output=True, timeout=10)
+            print(f"  ✅ RAM limpiada en {host}")
+        except Exception as e:
+            print(f"  ⚠️  Error limpiando RAM en {host}: {e}")
+
+    services = _services(host)
+    if not restart or not services:
+        return
+    try:
+        # Una sola llamada: systemd reinicia todas las unidades en paralelo
+        subprocess.run(_command(host, 'systemctl', 'restart', *services),
+                       check=True, capture_output=True, timeout=30)
+        print(f"  ✅ {', '.join(services)} reiniciado en {host}")
+    except Exception as e:
+        print(f"  ⚠️  Error reiniciando {', '.join(services)} en {host}: {e}")
+
+
+def reset_cluster(restart=False):
+    """Lanza reset_host en todos los nodos a la vez y espera a que acaben"""
+    with ThreadPoolExecutor(max_workers=len(HOSTS)) as pool:
+        list(pool.map(lambda host: reset_host(host, restart), HOSTS))
+
+
+def clear_ram_remote():
+    """Limpia la caché del SO en los tres nodos (sin reiniciar MongoDB)"""
+    print("  🧹 Limpiando RAM en todos los nodos...")
+    reset_cluster(restart=False)
+
+
+def clear_ram_and_restart_mongodb(database=None):
+    """
+    Limpia caché del SO y reinicia MongoDB para caché frío; vuelve cuando
+    shards, config server y mongos (con rutas a `database`) están listos
+    """
+    print("  🔄 Limpiando RAM y reiniciando MongoDB en todos los nodos...")
+    reset_cluster(restart=True)
+    print("  ⏳ Esperando a que MongoDB arranque...")
+    waited = wait_until_ready(database=database)
+    print(f"  ✅ Cluster listo en {waited:.1f}s")
+
+
+def probe_wiredtiger_cache(members=CLUSTER_MEMBERS):
+    """
+    {nodo: (bytes en caché, máximo configurado)} de serverStatus().wiredTiger
+    en cada mongod; (None, None) si el nodo no responde
+    """
+    def probe(host):
+        client = MongoClient(host, directConnection=True, serverSelectionTimeoutMS=2000)
+        try:
+            status = client.admin.command("serverStatus", repl=0, metrics=0, locks=0)
+            cache = status["wiredTiger"]["cache"]
+            return (int(cache["bytes currently in the cache"]),
+                    int(cache["maximum bytes configured"]))
+        except Exception as e:
+            print(f"  ⚠️  Error leyendo caché WiredTiger de {host}: {e}")
+            return (None, None)
+        finally:
+            client.close()
+
+    with ThreadPoolExecutor(max_workers=len(members)) as pool:
+        results = pool.map(probe, members.values())
+        return dict(zip(members, results))
+
+
+def print_residency(residency):
+    parts = [f"{node} {'?' if used is None else f'{used/1024**2:.1f} MB'}"
+             for node, (used, _) in residency.items()]
+    print(f"  🧊 Caché WiredTiger: {', '.join(parts)}")
+
+
+def check_cold(residency, limit):
+    """Lanza CacheNotCold si algún mongod supera `limit` bytes (o no se pudo medir)"""
+    warm = [f"{node}={'?' if used is None else f'{used/1024**2:.1f} MB'}"
+            for node, (used, _) in residency.items() if used is None or used > limit]
+    if warm:
+        raise CacheNotCold(f"caché por encima de {limit/1024**2:.1f} MB: {', '.join(warm)}")
+
+
+def wait_until_cold(limit, members=CLUSTER_MEMBERS, timeout=COLD_CACHE_TIMEOUT,
+                    poll=READY_POLL, max_delay=READY_BACKOFF_MAX):
+    """
+    Mide la caché hasta que ningún mongod supera `limit` bytes y devuelve esa
+    medición; lanza CacheNotCold si vence `timeout`
+    """
+    deadline = time.monotonic() + timeout
+    delay = poll
+    while True:
+        residency = probe_wiredtiger_cache(members)
+        try:
+            check_cold(residency, limit)
+            return residency
+        except CacheNotCold as e:
+            if time.monotonic() + delay > deadline:
+                print(f"  ⚠️  La caché no se enfrió en {timeout}s: {e}")
+                raise
+            print(f"  ⏳ {e} (nueva medida en {delay:.2f}s)")
+            time.sleep(delay)
+            delay = min(delay * 2, max_delay)
+
+
+def dump_cache_csv(path, query_name, iteration, residency):
+    """Añade una fila por nodo al CSV de caché (crea cabecera si no existe)"""
+    new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+    timestamp = datetime.now().isoformat()
+    with open(path, "a", newline="") as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(CACHE_FIELDNAMES)
+        for node, (used, maximum) in residency.items():
+            writer.writerow([query_name, iteration, node,
+                             "" if used is None else used,
+                             "" if maximum is None else maximum, timestamp])
+        f.flush()
+        os.fsync(f.fileno())
@@ -0,0 +1,73 @@
+"""
+Manifiesto de checkpoint para reanudar ejecuciones interrumpidas
+
+Tras cada iteración (ya con fsync) se reescribe <stem>.checkpoint.json con
+las iteraciones completadas y el tamaño de cada fichero de resultados en
+ese momento. Al relanzar la misma query se saltan las iteraciones hechas y
+los ficheros se truncan a ese tamaño (descartando filas de una iteración a
+medias) antes de seguir añadiendo.
+"""
+import json
+import os
+from datetime import datetime
+
+
+class Checkpoint:
+
+    def __init__(self, path, label, completed=None, sizes=None):
+        self.path = path
+        self.label = label
+        self.completed = sorted(completed or [])
+        self.sizes = dict(sizes or {})
+
+    @classmethod
+    def load(cls, path, label):
+        """Manifiesto existente de `label`, o uno vacío si no hay/no coincide"""
+        if not os.path.exists(path):
+            return cls(path, label)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Checkpoint ilegible ({e}): se empieza de cero")
+            return cls(path, label)
+        if data.get("query") != label:
+            print(f"⚠️  Checkpoint de otra query ({data.get('query')}): se empieza de cero")
+            return cls(path, label)
+        return cls(path, label, data.get("completed"), data.get("sizes"))
+
+    def is_done(self, iteration):
+        return iteration in self.completed
+
+    def restore_files(self):
+        """Trunca cada fichero registrado al tamaño del último checkpoint"""
+        for path, size in self.sizes.items():
+            if os.path.isfile(path) and os.path.getsize(path) > size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+    def record(self, iteration, files):
+        """Marca `iteration` como completada y guarda el tamaño de `files`"""
+        if iteration not in self.completed:
+            self.completed.append(iteration)
+            self.completed.sort()
+        self.sizes = {p: os.path.getsize(p) for p in files if os.path.isfile(p)}
+        data = {
+            "query": self.label,
+            "completed": self.completed,
+            "sizes": self.sizes,
+            "updated": datetime.now().isoformat(),
+        }
+        # Escritura atómica: un corte deja el manifiesto anterior intacto
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def reset(self):
+        self.completed = []
+        self.sizes = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,117 @@
+"""
+Configuración compartida del benchmark TPC-H (cluster 10.145.0.x)
+
+Con BENCH_CLUSTER=local se usa en su lugar el cluster de pruebas que levanta
+`python -m benchmark.harness up` en 127.0.0.1 (ver el final del fichero).
+"""
+import os
+
+MONGOS_URI = "mongodb://10.145.0.173:27017/"
+
+ENDPOINTS = {
+    "shard1": "http://10.145.0.173:8080/metrics",
+    "shard2": "http://10.145.0.175:8080/metrics",
+    "shard3": "http://10.145.0.176:8080/metrics"
+}
+
+SAMPLE_INTERVAL = 2
+SAMPLE_POLICY = "skip"  # ticks perdidos: "skip" o "catchup" (ver schedule.py)
+ITERATIONS = 30
+QUERY_TIMEOUT = 7200  # 2 horas = 7200 segundos
+
+# Nodos del cluster: 173 aloja shard1 + config server + mongos
+LOCAL_HOST = "10.145.0.173"
+REMOTE_HOSTS = ["10.145.0.175", "10.145.0.176"]
+SSH_USER = "martin"
+CLEAN_RAM_SCRIPT = "/usr/local/bin/clean_ram.sh"
+
+# Servicios systemd que hay que reiniciar para vaciar la caché de WiredTiger
+LOCAL_SERVICES = ["mongod-shard1", "mongod-config"]
+REMOTE_SERVICE = "mongod"
+
+# mongod de cada shard y del config server (puertos por defecto de
+# --shardsvr/--configsvr), sondeados directamente tras un reinicio
+CLUSTER_MEMBERS = {
+    "shard1": "10.145.0.173:27018",
+    "shard2": "10.145.0.175:27018",
+    "shard3": "10.145.0.176:27018",
+    "config": "10.145.0.173:27019"
+}
+
+# Tras reiniciar: plazo máximo hasta que el cluster esté listo; el sondeo
+# empieza cada READY_POLL segundos y se duplica hasta READY_BACKOFF_MAX
+READY_TIMEOUT = 120
+READY_POLL = 0.25
+READY_BACKOFF_MAX = 4
+
+# Ejecuciones en frío: si no es None, una iteración no empieza mientras algún
+# mongod tenga más de estos bytes en la caché de WiredTiger (p.ej. 64 * 1024**2)
+COLD_CACHE_MAX_BYTES = None
+# Plazo para que la caché baje de ese límite (se vuelve a medir con el mismo
+# backoff que READY_*); si vence se repite el setup una vez y, si sigue
+# caliente, la iteración se salta y queda pendiente para la siguiente ejecución
+COLD_CACHE_TIMEOUT = 60
+
+# Ejecuciones en caliente (Query.warm): etapas de precalentamiento, "touch"
+# (recorrer colecciones e índices) y/o, a petición con --prewarm iterations,
+# "iterations" (iteraciones descartadas hasta que la latencia se estabiliza:
+# las últimas PREWARM_WINDOW difieren menos de PREWARM_TOLERANCE respecto a
+# su mediana). Al reanudar una serie ya empezada no se precalienta
+PREWARM = ["touch"]
+PREWARM_MAX_ITERATIONS = 10
+PREWARM_WINDOW = 3
+PREWARM_TOLERANCE = 0.05
+
+# Perfil de índices (indexes.PROFILES) que el runner construye y verifica
+# antes de la primera query de cada esquema; None: sólo registra los que haya.
+# sin_diseno se mide sin índices secundarios; "embedded" se pide con --indexes
+INDEX_PROFILES = {"indices": "tpch", "sin_diseno": "none"}
+
+# $lookup correlacionados con $expr: "correlated" ejecuta los pipelines tal
+# cual, como las series históricas; "indexed" (--lookups indexed) los reescribe
+# a localField/foreignField para usar índices (MongoDB 5.0+, ver lookups.py)
+LOOKUP_STRATEGY = "correlated"
+
+# Un mongod es el config server si su cmdline contiene alguno de estos textos
+CONFIG_SERVER_MARKERS = ["--configsvr", "mongod-config"]
+
+# Formatos de salida de las muestras: "parquet", "arrow" y/o "csv"
+OUTPUT_FORMATS = ["parquet"]
+OUTPUT_BATCH_ROWS = 512  # filas por row group / record batch
+
+# Hilo escritor: filas encolables, y flush cada N filas o cada T segundos
+# (además de fsync al terminar cada iteración)
+WRITER_BUFFER_ROWS = 4096
+WRITER_FLUSH_ROWS = 64
+WRITER_FLUSH_SECONDS = 10
+
+CSV_FIELDNAMES = [
+    "query", "iteration", "elapsed_time_seconds",
+    "power_shard1_watts", "power_shard2_watts", "power_shard3_watts",
+    "power_total_watts", "timestamp", "scrape_skew_ms",
+    "sample_jitter_ms"
+]
+
+# Cluster local de pruebas (benchmark/harness.py): puertos de cada proceso y
+# de los exportadores /metrics falsos de cada "nodo"
+CLUSTER = os.environ.get("BENCH_CLUSTER", "lab")
+LOCAL_PORTS = {
+    "mongos": 27117,
+    "config": 27119,
+    "shard1": 27118,
+    "shard2": 27128,
+    "shard3": 27138
+}
+LOCAL_EXPORTER_PORTS = {"shard1": 9181, "shard2": 9182, "shard3": 9183}
+
+if CLUSTER == "local":
+    MONGOS_URI = f"mongodb://127.0.0.1:{LOCAL_PORTS['mongos']}/"
+    ENDPOINTS = {node: f"http://127.0.0.1:{port}/metrics"
+                 for node, port in LOCAL_EXPORTER_PORTS.items()}
+    CLUSTER_MEMBERS = {name: f"127.0.0.1:{LOCAL_PORTS[name]}"
+                       for name in ("shard1", "shard2", "shard3", "config")}
+    # Un solo host y sin root: ni limpieza de caché del SO ni reinicios
+    LOCAL_HOST = "127.0.0.1"
+    REMOTE_HOSTS = []
+    CLEAN_RAM_SCRIPT = None
+    LOCAL_SERVICES = []
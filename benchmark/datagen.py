@@ -0,0 +1,278 @@
+"""
+Generador de datos TPC-H (tablas, cardinalidades y dominios de la
+especificación, sección 4.2)
+
+Cada tabla se genera por rangos de clave independientes: la semilla de cada
+bloque de filas sale de (seed, tabla, bloque), así que cualquier
+proceso puede producir cualquier rango y el resultado no depende de cómo se
+reparta la carga. Las filas salen en formato neutro (fechas datetime,
+importes float); cada esquema las adapta al guardarlas (ver loader.py).
+"""
+import random
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+# Filas por semilla; los proveedores van de uno en uno porque se consultan
+# sueltos para desnormalizarlos (supplier())
+BLOCKS = {"supplier": 1, "customer": 1000, "part": 1000, "orders": 1000}
+
+START_DATE = datetime(1992, 1, 1)
+END_DATE = datetime(1998, 12, 31)
+CURRENT_DATE = datetime(1995, 6, 17)
+
+REGIONS = ["AFRICA", "AMERICA", "ASIA", "EUROPE", "MIDDLE EAST"]
+NATIONS = [
+    ("ALGERIA", 0), ("ARGENTINA", 1), ("BRAZIL", 1), ("CANADA", 1), ("EGYPT", 4),
+    ("ETHIOPIA", 0), ("FRANCE", 3), ("GERMANY", 3), ("INDIA", 2), ("INDONESIA", 2),
+    ("IRAN", 4), ("IRAQ", 4), ("JAPAN", 2), ("JORDAN", 4), ("KENYA", 0),
+    ("MOROCCO", 0), ("MOZAMBIQUE", 0), ("PERU", 1), ("CHINA", 2), ("ROMANIA", 3),
+    ("SAUDI ARABIA", 4), ("VIETNAM", 2), ("RUSSIA", 3), ("UNITED KINGDOM", 3),
+    ("UNITED STATES", 1)
+]
+
+COLORS = (
+    "almond antique aquamarine azure beige bisque black blanched blue blush brown "
+    "burlywood burnished chartreuse chiffon chocolate coral cornflower cornsilk cream "
+    "cyan dark deep dim dodger drab firebrick floral forest frosted gainsboro ghost "
+    "goldenrod green grey honeydew hot indian ivory khaki lace lavender lawn lemon "
+    "light lime linen magenta maroon medium metallic midnight mint misty moccasin "
+    "navajo navy olive orange orchid pale papaya peach peru pink plum powder puff "
+    "purple red rose rosy royal saddle salmon sandy seashell sienna sky slate smoke "
+    "snow spring steel tan thistle tomato turquoise violet wheat white yellow"
+).split()
+TYPE_SIZES = ["STANDARD", "SMALL", "MEDIUM", "LARGE", "ECONOMY", "PROMO"]
+TYPE_FINISHES = ["ANODIZED", "BURNISHED", "PLATED", "POLISHED", "BRUSHED"]
+TYPE_MATERIALS = ["TIN", "NICKEL", "BRASS", "STEEL", "COPPER"]
+CONTAINER_SIZES = ["SM", "LG", "MED", "JUMBO", "WRAP"]
+CONTAINER_KINDS = ["CASE", "BOX", "BAG", "JAR", "PKG", "PACK", "CAN", "DRUM"]
+SEGMENTS = ["AUTOMOBILE", "BUILDING", "FURNITURE", "MACHINERY", "HOUSEHOLD"]
+PRIORITIES = ["1-URGENT", "2-HIGH", "3-MEDIUM", "4-NOT SPECIFIED", "5-LOW"]
+INSTRUCTIONS = ["DELIVER IN PERSON", "COLLECT COD", "NONE", "TAKE BACK RETURN"]
+MODES = ["REG AIR", "AIR", "RAIL", "SHIP", "TRUCK", "MAIL", "FOB"]
+
+# Gramática de comentarios reducida: lo justo para que LIKE '%special%requests%'
+# (Q13) o '%Customer%Complaints%' (Q16) encuentren filas
+_WORDS = (
+    "furiously quickly carefully blithely slyly fluffily final regular special "
+    "pending express ironic bold even silent unusual ideas requests packages "
+    "deposits accounts instructions foxes theodolites pinto beans dependencies "
+    "platelets asymptotes courts dolphins sleep wake are haggle nag use boost "
+    "affix detect integrate cajole among above against along across"
+).split()
+
+
+def scale(sf):
+    """Filas por tabla para el factor de escala `sf`"""
+    return {
+        "supplier": int(10_000 * sf),
+        "part": int(200_000 * sf),
+        "customer": int(150_000 * sf),
+        "orders": int(1_500_000 * sf),
+    }
+
+
+def _rng(seed, table, block):
+    return random.Random(f"{seed}:{table}:{block}")
+
+
+def _blocks(table, sf, start, stop, seed):
+    """(índice, rng) para cada fila de [start, stop) con la semilla de su bloque"""
+    size = BLOCKS[table]
+    build = _GENERATORS[table]
+    block = None
+    rng = None
+    for i in range(start, stop):
+        if i // size != block:
+            block = i // size
+            rng = _rng(seed, table, block)
+            # Un rango que empieza a mitad de bloque consume antes las filas
+            # previas del bloque (con el mismo sf: los rangos de randint
+            # cambian cuántos números se extraen)
+            for skipped in range(block * size, i):
+                build(rng, skipped, sf)
+        yield i, rng
+
+
+def _text(rng, low, high):
+    words = []
+    length = rng.randint(low, high)
+    while sum(len(w) + 1 for w in words) < length:
+        words.append(rng.choice(_WORDS))
+    return " ".join(words)[:high]
+
+
+def _money(rng, low, high):
+    return round(rng.randint(int(low * 100), int(high * 100)) / 100, 2)
+
+
+def _phone(rng, nationkey):
+    return (f"{nationkey + 10}-{rng.randint(100, 999)}-"
+            f"{rng.randint(100, 999)}-{rng.randint(1000, 9999)}")
+
+
+def _address(rng):
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789, ")
+                   for _ in range(rng.randint(10, 40)))
+
+
+def retail_price(partkey):
+    return (90_000 + ((partkey // 10) % 20_001) + 100 * (partkey % 1000)) / 100
+
+
+def order_key(index):
+    """Las claves de pedido son dispersas: 8 de cada 32"""
+    return (index // 8) * 32 + (index % 8) + 1
+
+
+def regions():
+    return [{"r_regionkey": k, "r_name": name, "r_comment": _text(_rng(0, "region", k), 31, 115)}
+            for k, name in enumerate(REGIONS)]
+
+
+def nations():
+    return [{"n_nationkey": k, "n_name": name, "n_regionkey": region,
+             "n_comment": _text(_rng(0, "nation", k), 31, 114)}
+            for k, (name, region) in enumerate(NATIONS)]
+
+
+def _supplier(rng, index, sf):
+    key = index + 1
+    nationkey = rng.randint(0, 24)
+    comment = _text(rng, 25, 100)
+    # 5 de cada 10.000 proveedores con quejas y otros 5 con recomendaciones
+    mark = rng.random()
+    if mark < 0.0005:
+        comment = f"{comment[:40]} Customer {comment[40:70]} Complaints"
+    elif mark < 0.001:
+        comment = f"{comment[:40]} Customer {comment[40:70]} Recommends"
+    return {
+        "s_suppkey": key,
+        "s_name": f"Supplier#{key:09d}",
+        "s_address": _address(rng),
+        "s_nationkey": nationkey,
+        "s_phone": _phone(rng, nationkey),
+        "s_acctbal": _money(rng, -999.99, 9999.99),
+        "s_comment": comment,
+    }
+
+
+def _customer(rng, index, sf):
+    key = index + 1
+    nationkey = rng.randint(0, 24)
+    return {
+        "c_custkey": key,
+        "c_name": f"Customer#{key:09d}",
+        "c_address": _address(rng),
+        "c_nationkey": nationkey,
+        "c_phone": _phone(rng, nationkey),
+        "c_acctbal": _money(rng, -999.99, 9999.99),
+        "c_mktsegment": rng.choice(SEGMENTS),
+        "c_comment": _text(rng, 29, 116),
+    }
+
+
+def partsupp_suppkey(partkey, i, suppliers):
+    return (partkey + i * (suppliers // 4 + (partkey - 1) // suppliers)) % suppliers + 1
+
+
+def _part(rng, index, sf):
+    """(part, [partsupp x4])"""
+    key = index + 1
+    manufacturer = rng.randint(1, 5)
+    part = {
+        "p_partkey": key,
+        "p_name": " ".join(rng.sample(COLORS, 5)),
+        "p_mfgr": f"Manufacturer#{manufacturer}",
+        "p_brand": f"Brand#{manufacturer}{rng.randint(1, 5)}",
+        "p_type": f"{rng.choice(TYPE_SIZES)} {rng.choice(TYPE_FINISHES)} {rng.choice(TYPE_MATERIALS)}",
+        "p_size": rng.randint(1, 50),
+        "p_container": f"{rng.choice(CONTAINER_SIZES)} {rng.choice(CONTAINER_KINDS)}",
+        "p_retailprice": retail_price(key),
+        "p_comment": _text(rng, 5, 22),
+    }
+    suppliers = max(1, scale(sf)["supplier"])
+    partsupps = [{
+        "ps_partkey": key,
+        "ps_suppkey": partsupp_suppkey(key, i, suppliers),
+        "ps_availqty": rng.randint(1, 9999),
+        "ps_supplycost": _money(rng, 1.00, 1000.00),
+        "ps_comment": _text(rng, 49, 198),
+    } for i in range(4)]
+    return part, partsupps
+
+
+def _order(rng, index, sf):
+    """(order, [lineitem x1..7])"""
+    counts = scale(sf)
+    key = order_key(index)
+    customers = max(1, counts["customer"])
+    # Un tercio de los clientes (custkey múltiplo de 3) nunca hace pedidos
+    custkey = rng.randint(1, customers)
+    if customers > 2:
+        while custkey % 3 == 0:
+            custkey = rng.randint(1, customers)
+    orderdate = START_DATE + timedelta(days=rng.randint(0, (END_DATE - START_DATE).days - 151))
+    parts = max(1, counts["part"])
+    suppliers = max(1, counts["supplier"])
+
+    lineitems = []
+    for number in range(1, rng.randint(1, 7) + 1):
+        partkey = rng.randint(1, parts)
+        quantity = rng.randint(1, 50)
+        shipdate = orderdate + timedelta(days=rng.randint(1, 121))
+        receiptdate = shipdate + timedelta(days=rng.randint(1, 30))
+        lineitems.append({
+            "l_orderkey": key,
+            "l_partkey": partkey,
+            "l_suppkey": partsupp_suppkey(partkey, rng.randint(0, 3), suppliers),
+            "l_linenumber": number,
+            "l_quantity": quantity,
+            "l_extendedprice": round(quantity * retail_price(partkey), 2),
+            "l_discount": rng.randint(0, 10) / 100,
+            "l_tax": rng.randint(0, 8) / 100,
+            "l_returnflag": rng.choice("RA") if receiptdate <= CURRENT_DATE else "N",
+            "l_linestatus": "O" if shipdate > CURRENT_DATE else "F",
+            "l_shipdate": shipdate,
+            "l_commitdate": orderdate + timedelta(days=rng.randint(30, 90)),
+            "l_receiptdate": receiptdate,
+            "l_shipinstruct": rng.choice(INSTRUCTIONS),
+            "l_shipmode": rng.choice(MODES),
+            "l_comment": _text(rng, 10, 43),
+        })
+
+    statuses = {li["l_linestatus"] for li in lineitems}
+    order = {
+        "o_orderkey": key,
+        "o_custkey": custkey,
+        "o_orderstatus": statuses.pop() if len(statuses) == 1 else "P",
+        "o_totalprice": round(sum(li["l_extendedprice"] * (1 + li["l_tax"]) * (1 - li["l_discount"])
+                                  for li in lineitems), 2),
+        "o_orderdate": orderdate,
+        "o_orderpriority": rng.choice(PRIORITIES),
+        "o_clerk": f"Clerk#{rng.randint(1, max(1, int(sf * 1000))):09d}",
+        "o_shippriority": 0,
+        "o_comment": _text(rng, 19, 78),
+    }
+    return order, lineitems
+
+
+_GENERATORS = {
+    "supplier": _supplier,
+    "customer": _customer,
+    "part": _part,
+    "orders": _order,
+}
+
+
+def generate(table, sf, start, stop, seed=0):
+    """Filas [start, stop) de `table` ("supplier", "customer", "part", "orders")"""
+    build = _GENERATORS[table]
+    for index, rng in _blocks(table, sf, start, stop, seed):
+        yield build(rng, index, sf)
+
+
+@lru_cache(maxsize=65536)
+def supplier(sf, key, seed=0):
+    """Proveedor `key` (1..N) suelto, para desnormalizarlo en otras tablas"""
+    index = key - 1
+    return next(generate("supplier", sf, index, index + 1, seed))
@@ -0,0 +1,191 @@
+"""
+Migración de las fechas TPC-H a BSON Date en los dos esquemas
+
+    python -m benchmark.dates migrate                    # sin_diseno e indices
+    python -m benchmark.dates migrate --verify Q1 Q3 Q7  # compara resultados
+                                                         # (Q7 sólo en sin_diseno)
+    python -m benchmark.dates check                      # cuenta fechas en texto
+
+Las bases cargadas antes guardaban en tpch_optimized las fechas como texto
+"YYYY-MM-DD", así que sin_diseño/ comparaba cadenas e indices/ fechas. La
+migración convierte en el servidor (update con pipeline, idempotente) todo
+campo de fecha que aún sea texto, también dentro de los arrays embebidos.
+
+Con --verify se ejecutan las queries antes de migrar, con sus fechas
+pasadas a texto (as_text_dates), y después tal cual; los resultados deben
+coincidir fila a fila (fechas normalizadas a "YYYY-MM-DD" y números con
+9 cifras significativas). Cada esquema compara las queries pedidas que
+define; un nombre que no existe en ninguno se rechaza antes de migrar.
+"""
+import argparse
+import copy
+import time
+from datetime import datetime
+
+from pymongo import MongoClient
+
+from .config import MONGOS_URI
+from .queries import DATABASES, SCHEMAS, get_queries
+
+LINEITEM_DATES = ["l_shipdate", "l_commitdate", "l_receiptdate"]
+
+# esquema -> {colección: (campos de fecha, {array embebido: campos})}
+DATE_FIELDS = {
+    "sin_diseno": {
+        "orders_with_lineitems": (["o_orderdate"], {"lineitems": LINEITEM_DATES}),
+    },
+    "indices": {
+        "orders": (["o_orderdate"], {}),
+        "lineitems": (LINEITEM_DATES, {}),
+    },
+}
+
+
+def to_date(expr):
+    """Expresión que convierte `expr` a Date si es texto ("YYYY-MM-DD...")"""
+    return {"$cond": [
+        {"$eq": [{"$type": expr}, "string"]},
+        {"$dateFromString": {"dateString": {"$substrCP": [expr, 0, 10]},
+                             "format": "%Y-%m-%d", "timezone": "UTC"}},
+        expr
+    ]}
+
+
+def migration_update(fields, arrays):
+    """(filtro, pipeline de update) que deja como Date los campos de una colección"""
+    text = [{field: {"$type": "string"}} for field in fields]
+    text += [{f"{array}.{field}": {"$type": "string"}}
+             for array, nested in arrays.items() for field in nested]
+    stage = {field: to_date(f"${field}") for field in fields}
+    for array, nested in arrays.items():
+        stage[array] = {"$map": {
+            "input": f"${array}",
+            "as": "item",
+            "in": {"$mergeObjects": [
+                "$$item", {field: to_date(f"$$item.{field}") for field in nested}
+            ]}
+        }}
+    return {"$or": text}, [{"$set": stage}]
+
+
+def text_dates(client, schema):
+    """{colección: documentos con alguna fecha aún en texto}"""
+    db = client[DATABASES[schema]]
+    return {collection: db[collection].count_documents(migration_update(fields, arrays)[0])
+            for collection, (fields, arrays) in DATE_FIELDS[schema].items()}
+
+
+def migrate(client, schema):
+    """Convierte las fechas en texto del esquema; devuelve los documentos cambiados"""
+    db = client[DATABASES[schema]]
+    changed = 0
+    for collection, (fields, arrays) in DATE_FIELDS[schema].items():
+        t0 = time.monotonic()
+        query, pipeline = migration_update(fields, arrays)
+        result = db[collection].update_many(query, pipeline)
+        changed += result.modified_count
+        print(f"  📅 {db.name}.{collection}: {result.modified_count} documentos "
+              f"en {time.monotonic() - t0:.1f}s")
+    return changed
+
+
+def as_text_dates(node):
+    """Copia de un pipeline para fechas en texto: literales "YYYY-MM-DD" y $year sobre $toDate"""
+    if isinstance(node, datetime):
+        return node.strftime("%Y-%m-%d")
+    if isinstance(node, list):
+        return [as_text_dates(item) for item in node]
+    if isinstance(node, dict):
+        return {key: {"$toDate": as_text_dates(value)} if key == "$year" else as_text_dates(value)
+                for key, value in node.items()}
+    return node
+
+
+def normalize(node):
+    """Resultado comparable entre tipos de fecha y redondeos de sumas"""
+    if isinstance(node, datetime):
+        return node.strftime("%Y-%m-%d")
+    if isinstance(node, float):
+        return float(f"{node:.9g}")
+    if isinstance(node, list):
+        return [normalize(item) for item in node]
+    if isinstance(node, dict):
+        return {key: normalize(value) for key, value in node.items()}
+    return node
+
+
+def snapshot(client, queries, text_dates=False):
+    """{query: resultado normalizado}; con `text_dates`, para fechas aún en texto"""
+    results = {}
+    for query in queries:
+        if text_dates and query.pipeline is not None:
+            query = copy.copy(query)
+            query.pipeline = as_text_dates(query.pipeline)
+        t0 = time.monotonic()
+        results[query.name] = normalize(query.execute(client[query.database]))
+        print(f"  🔎 {query.name}: {len(results[query.name])} filas "
+              f"en {time.monotonic() - t0:.1f}s")
+    return results
+
+
+def compare(before, after):
+    """Nombres de las queries cuyo resultado cambió"""
+    differ = []
+    for name, rows in before.items():
+        if rows == after.get(name):
+            print(f"  ✅ {name}: {len(rows)} filas idénticas")
+        else:
+            differ.append(name)
+            print(f"  ❌ {name}: {len(rows)} filas antes, {len(after.get(name, []))} después")
+    return differ
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmark.dates", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["migrate", "check"])
+    parser.add_argument("queries", nargs="*", help="queries a comparar con --verify (por defecto todas)")
+    parser.add_argument("--schema", choices=list(SCHEMAS) + ["both"], default="both")
+    parser.add_argument("--verify", action="store_true",
+                        help="compara los resultados de las queries antes y después")
+    parser.add_argument("--uri", default=MONGOS_URI)
+    # intermixed: "migrate --verify Q1 Q3" deja las queries detrás de la opción
+    args = parser.parse_intermixed_args(argv)
+
+    schemas = list(SCHEMAS) if args.schema == "both" else [args.schema]
+    # Antes de migrar nada: un nombre erróneo no puede cortar a medias
+    known = {name for schema in schemas for name in SCHEMAS[schema][1]}
+    unknown = [name for name in args.queries if name not in known]
+    if unknown:
+        parser.error(f"queries desconocidas en {', '.join(schemas)}: {', '.join(unknown)}")
+    client = MongoClient(args.uri)
+    differ = []
+    try:
+        for schema in schemas:
+            print(f"🗂️  {schema} ({DATABASES[schema]})")
+            pending = text_dates(client, schema)
+            for collection, count in pending.items():
+                print(f"  {'⚠️ ' if count else '✅'} {collection}: {count} documentos con fechas en texto")
+            if args.command == "check":
+                continue
+            names = [name for name in args.queries if name in SCHEMAS[schema][1]]
+            if not args.verify or (args.queries and not names):
+                queries = []
+            else:
+                queries = get_queries(schema, names or None)
+            before = snapshot(client, queries, text_dates=any(pending.values()))
+            migrate(client, schema)
+            if args.verify:
+                differ += [f"{schema}/{name}" for name in compare(before, snapshot(client, queries))]
+    finally:
+        client.close()
+
+    if differ:
+        print(f"❌ Resultados distintos: {', '.join(differ)}")
+        raise SystemExit(1)
+    if args.command == "migrate":
+        print("✅ Fechas migradas a BSON Date")
+
+
+if __name__ == "__main__":
+    main()
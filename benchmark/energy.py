@@ -0,0 +1,220 @@
+"""
+Integración de energía sobre los q*_energy_metrics.*
+
+    python -m benchmark.energy indices/Q*/q*_energy_metrics.csv -o resultados/
+
+Acepta .csv, .parquet y .arrow (fichero o directorio de segmentos por
+iteración, como los que escribe el runner). Integra la potencia (regla del trapecio)
+sobre elapsed_time_seconds por iteración y resume por query con intervalos
+de confianza al 95%.
+Requiere NumPy (sólo este módulo; el runner no lo necesita).
+"""
+import argparse
+import csv
+import math
+import os
+
+import numpy as np
+
+POWER_COLUMNS = ["power_shard1_watts", "power_shard2_watts",
+                 "power_shard3_watts", "power_total_watts"]
+
+# t de Student bilateral al 95% por grados de libertad (>30: normal)
+_T95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+
+def t95(df):
+    if df < 1:
+        return float("nan")
+    return _T95[df - 1] if df <= len(_T95) else 1.960
+
+
+def _load_csv(path):
+    queries, iterations, elapsed = [], [], []
+    power = {c: [] for c in POWER_COLUMNS}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            queries.append(row["query"])
+            iterations.append(int(row["iteration"]))
+            elapsed.append(float(row["elapsed_time_seconds"]))
+            for c in POWER_COLUMNS:
+                power[c].append(float(row[c] or 0))
+    data = {
+        "query": np.array(queries, dtype=object),
+        "iteration": np.array(iterations, dtype=np.int64),
+        "elapsed": np.array(elapsed, dtype=np.float64),
+    }
+    for c in POWER_COLUMNS:
+        data[c] = np.array(power[c], dtype=np.float64)
+    return data
+
+
+def _load_arrow(path):
+    """Parquet / Arrow IPC: columnas ya tipadas, sin parseo de texto"""
+    import pyarrow as pa
+    import pyarrow.dataset
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    columns = ["query", "iteration", "elapsed_time_seconds"] + POWER_COLUMNS
+    path = path.rstrip(os.sep)
+    if os.path.isdir(path):
+        fmt = "parquet" if path.endswith(".parquet") else "ipc"
+        table = pa.dataset.dataset(path, format=fmt).to_table(columns=columns)
+    elif path.endswith(".parquet"):
+        table = pa.parquet.read_table(path, columns=columns)
+    else:
+        with pa.ipc.open_file(path) as reader:
+            table = reader.read_all().select(columns)
+    data = {
+        "query": table.column("query").to_numpy(zero_copy_only=False).astype(object),
+        "iteration": table.column("iteration").to_numpy().astype(np.int64),
+        "elapsed": table.column("elapsed_time_seconds").to_numpy(),
+    }
+    for c in POWER_COLUMNS:
+        data[c] = table.column(c).to_numpy()
+    return data
+
+
+def load_samples(paths):
+    """
+    Lee uno o varios ficheros de muestras (.csv, .parquet, .arrow) a columnas
+    NumPy: {"query": array(str), "iteration": int64, "elapsed": float64, power...}
+    """
+    parts = [_load_arrow(p) if p.rstrip(os.sep).endswith((".parquet", ".arrow"))
+             else _load_csv(p)
+             for p in paths]
+    if not parts:
+        return _empty_samples()
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+
+def _empty_samples():
+    data = {"query": np.array([], dtype=object),
+            "iteration": np.array([], dtype=np.int64),
+            "elapsed": np.array([], dtype=np.float64)}
+    for c in POWER_COLUMNS:
+        data[c] = np.array([], dtype=np.float64)
+    return data
+
+
+def integrate_iterations(data):
+    """
+    Energía (J) por (query, iteración) con la regla del trapecio.
+
+    Las filas se ordenan por tiempo dentro de cada iteración, de modo que la
+    "muestra final" que añaden las queries de indices/ (escrita con
+    elapsed = duración de la query, tras el último sample periódico) queda
+    en su sitio aunque aparezca después en el fichero.
+    """
+    if len(data["elapsed"]) == 0:
+        return []
+    query_codes, query_names = _encode(data["query"])
+    order = np.lexsort((data["elapsed"], data["iteration"], query_codes))
+    q = query_codes[order]
+    it = data["iteration"][order]
+    t = data["elapsed"][order]
+
+    # Inicio de cada grupo (query, iteración)
+    new_group = np.ones(len(t), dtype=bool)
+    new_group[1:] = (q[1:] != q[:-1]) | (it[1:] != it[:-1])
+    starts = np.flatnonzero(new_group)
+    ends = np.append(starts[1:], len(t))
+
+    # Trapecios entre filas consecutivas; los que cruzan grupos valen 0
+    dt = np.diff(t)
+    same = ~new_group[1:]
+    energy = {}
+    for c in POWER_COLUMNS:
+        p = data[c][order]
+        area = np.where(same, dt * (p[1:] + p[:-1]) / 2, 0.0)
+        # reduceat sobre el trapecio que sale de cada fila de inicio
+        energy[c] = np.add.reduceat(np.append(area, 0.0), starts)
+
+    duration = t[ends - 1] - t[starts]
+    samples = ends - starts
+    rows = []
+    for g, s in enumerate(starts):
+        total = energy["power_total_watts"][g]
+        rows.append({
+            "query": query_names[q[s]],
+            "iteration": int(it[s]),
+            "samples": int(samples[g]),
+            "duration_seconds": float(duration[g]),
+            "energy_shard1_joules": float(energy["power_shard1_watts"][g]),
+            "energy_shard2_joules": float(energy["power_shard2_watts"][g]),
+            "energy_shard3_joules": float(energy["power_shard3_watts"][g]),
+            "energy_total_joules": float(total),
+            "avg_power_watts": float(total / duration[g]) if duration[g] > 0 else float("nan"),
+        })
+    return rows
+
+
+def summarize_queries(iteration_rows):
+    """Media, desviación e IC95% por query de energía, duración y potencia"""
+    by_query = {}
+    for row in iteration_rows:
+        by_query.setdefault(row["query"], []).append(row)
+    summary = []
+    for query, rows in by_query.items():
+        out = {"query": query, "iterations": len(rows)}
+        for key in ("energy_total_joules", "duration_seconds", "avg_power_watts"):
+            values = np.array([r[key] for r in rows], dtype=np.float64)
+            values = values[~np.isnan(values)]
+            n = len(values)
+            mean = float(values.mean()) if n else float("nan")
+            std = float(values.std(ddof=1)) if n > 1 else float("nan")
+            half = t95(n - 1) * std / math.sqrt(n) if n > 1 else float("nan")
+            out[f"{key}_mean"] = mean
+            out[f"{key}_std"] = std
+            out[f"{key}_ci95_low"] = mean - half
+            out[f"{key}_ci95_high"] = mean + half
+        summary.append(out)
+    return summary
+
+
+def write_table(rows, path):
+    if not rows:
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({k: f"{v:.6f}" if isinstance(v, float) else v
+                             for k, v in row.items()})
+
+
+def _encode(values):
+    names, codes = np.unique(values.astype(str), return_inverse=True)
+    return codes, names
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmark.energy", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="q*_energy_metrics.{csv,parquet,arrow}")
+    parser.add_argument("-o", "--output-dir", default=".")
+    args = parser.parse_args(argv)
+
+    iterations = integrate_iterations(load_samples(args.files))
+    summary = summarize_queries(iterations)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    iter_path = os.path.join(args.output_dir, "energy_per_iteration.csv")
+    query_path = os.path.join(args.output_dir, "energy_per_query.csv")
+    write_table(iterations, iter_path)
+    write_table(summary, query_path)
+
+    for row in summary:
+        print(f"⚡ {row['query']}: {row['energy_total_joules_mean']:.2f} J "
+              f"[{row['energy_total_joules_ci95_low']:.2f}, "
+              f"{row['energy_total_joules_ci95_high']:.2f}] "
+              f"en {row['iterations']} iteraciones")
+    print(f"📄 {iter_path}")
+    print(f"📄 {query_path}")
+
+
+if __name__ == "__main__":
+    main()
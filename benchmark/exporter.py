@@ -0,0 +1,338 @@
+"""
+Exportadores /metrics falsos con el formato de Scaphandre
+
+    python -m benchmark.exporter serve --port 9181 --host-processes 3000 --latency 0.05
+    python -m benchmark.exporter bench --host-processes 5000
+
+- ProcessExporter: potencia de procesos locales reales estimada con su
+  tiempo de CPU (/proc/<pid>/stat); lo usa el cluster local (harness.py).
+- SyntheticExporter: procesos mongod/mongos configurables con potencia
+  determinista (semilla), rodeados de miles de procesos ajenos del host y
+  otras familias de métricas, como un payload real.
+
+Ambos admiten latencia, jitter e inyección de fallos (error HTTP, conexión
+cortada, payload truncado o servido gota a gota) para probar que un
+exportador lento o caído no frena el muestreo.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .power import PROCESS_POWER_METRIC, PowerReader
+from .prometheus import iter_samples
+
+WATTS_PER_CORE = 15.0
+IDLE_WATTS = 0.5
+
+FAILURES = ("error", "reset", "truncate", "drip")
+
+# Procesos MongoDB de un nodo como 10.145.0.173: (pid, exe, cmdline, vatios)
+DEFAULT_PROCESSES = [
+    (1001, "/usr/bin/mongod", "/usr/bin/mongod --config /etc/mongod-shard1.conf", 8.0),
+    (1002, "/usr/bin/mongod", "/usr/bin/mongod --config /etc/mongod-config.conf", 1.5),
+    (1003, "/usr/bin/mongos", "/usr/bin/mongos --config /etc/mongos.conf", 1.0)
+]
+FILLER_EXES = ["bash", "sshd", "systemd", "python3", "containerd", "node",
+               "postgres", "java", "chrome", "kworker/0:1"]
+
+_CLK_TCK = os.sysconf("SC_CLK_TCK")
+
+
+def cpu_seconds(pid):
+    """utime + stime de un proceso, en segundos"""
+    with open(f"/proc/{pid}/stat") as f:
+        # El nombre del proceso (campo 2) puede tener espacios: se parte tras ")"
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / _CLK_TCK
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels):
+    return ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+
+
+def format_sample(labels, value, metric=PROCESS_POWER_METRIC):
+    return f"{metric}{{{format_labels(labels)}}} {value:.0f}\n"
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clientes que cortan a mitad (timeouts del sampler): no es un error
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def _family_header(metric, help_text, kind="gauge"):
+    return f"# HELP {metric} {help_text}\n# TYPE {metric} {kind}\n"
+
+
+class MetricsExporter:
+    """
+    Servidor /metrics en `port` (0: puerto libre) con latencia y fallos
+    inyectables; las subclases implementan payload(). `down = True` lo deja
+    respondiendo 503 hasta que se vuelva a poner a False.
+    """
+
+    def __init__(self, port=0, host="127.0.0.1", latency=0.0, jitter=0.0,
+                 failure_rate=0.0, failures=FAILURES, drip_seconds=5.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failures = tuple(failures)
+        self.drip_seconds = drip_seconds
+        self.down = False
+        self.requests = 0
+        self.injected = {name: 0 for name in FAILURES}
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.server = _Server((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def payload(self):
+        raise NotImplementedError
+
+    def _plan(self):
+        """(retraso, fallo o None) de la siguiente petición"""
+        with self._rng_lock:
+            self.requests += 1
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            failure = None
+            if self.failure_rate and self._rng.random() < self.failure_rate:
+                failure = self._rng.choice(self.failures)
+                self.injected[failure] += 1
+        return delay, failure
+
+    def _handler(self):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                if exporter.down:
+                    self.send_error(503)
+                    return
+                delay, failure = exporter._plan()
+                if delay:
+                    time.sleep(delay)
+                if failure == "error":
+                    self.send_error(500)
+                    return
+                if failure == "reset":
+                    # Cierra sin responder: el cliente ve la conexión cortada
+                    self.close_connection = True
+                    return
+                body = exporter.payload().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if failure == "truncate":
+                    self.wfile.write(body[:len(body) // 2])
+                    self.close_connection = True
+                elif failure == "drip":
+                    # Bytes a goteo: ningún read() individual agota el timeout
+                    chunks = 50
+                    step = max(1, len(body) // chunks)
+                    for i in range(0, len(body), step):
+                        self.wfile.write(body[i:i + step])
+                        self.wfile.flush()
+                        time.sleep(exporter.drip_seconds / chunks)
+                else:
+                    self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever,
+                                        name=f"exporter-{self.server.server_address[1]}",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class ProcessExporter(MetricsExporter):
+    """Potencia de `processes`, lista de (pid, exe, cmdline) locales"""
+
+    def __init__(self, port, processes, host="127.0.0.1", **options):
+        super().__init__(port, host, **options)
+        self.processes = list(processes)
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def process_power(self, pid):
+        """Microvatios estimados desde la lectura anterior del mismo pid"""
+        now = time.monotonic()
+        try:
+            cpu = cpu_seconds(pid)
+        except OSError:
+            return None
+        with self._lock:
+            last = self._last.get(pid)
+            self._last[pid] = (now, cpu)
+        if last is None or now <= last[0]:
+            return IDLE_WATTS * 1_000_000
+        cores = (cpu - last[1]) / (now - last[0])
+        return (IDLE_WATTS + cores * WATTS_PER_CORE) * 1_000_000
+
+    def payload(self):
+        lines = [_family_header(PROCESS_POWER_METRIC,
+                                "Power consumption of the process in microwatts")]
+        for pid, exe, cmdline in self.processes:
+            power = self.process_power(pid)
+            if power is not None:
+                lines.append(format_sample({"pid": pid, "exe": exe, "cmdline": cmdline}, power))
+        return "".join(lines)
+
+
+class SyntheticExporter(MetricsExporter):
+    """
+    `processes`: lista de (pid, exe, cmdline, vatios medios) MongoDB;
+    `host_processes`: procesos ajenos que acompañan en el payload. La
+    potencia varía ±`noise` alrededor de la media, determinista por petición.
+    """
+
+    def __init__(self, port=0, processes=DEFAULT_PROCESSES, host_processes=0,
+                 host="127.0.0.1", noise=0.1, seed=0, **options):
+        super().__init__(port, host, seed=seed, **options)
+        self.noise = noise
+        self.seed = seed
+        self._payloads = 0
+        rng = random.Random(seed)
+        procs = [(pid, exe, cmdline, watts) for pid, exe, cmdline, watts in processes]
+        for i in range(host_processes):
+            exe = FILLER_EXES[i % len(FILLER_EXES)]
+            procs.append((2000 + i, f"/usr/bin/{exe}", f"{exe} --worker {i}",
+                          rng.uniform(0.0, 0.5)))
+        # Los MongoDB quedan repartidos entre el resto, como en Scaphandre
+        rng.shuffle(procs)
+        self.labels = [(format_labels({"pid": pid, "exe": exe, "cmdline": cmdline}), watts)
+                       for pid, exe, cmdline, watts in procs]
+
+    def payload(self):
+        with self._rng_lock:
+            self._payloads += 1
+            rng = random.Random(self.seed * 1_000_003 + self._payloads)
+        power = [watts * (1 + rng.uniform(-self.noise, self.noise)) * 1_000_000
+                 for _, watts in self.labels]
+        out = [_family_header("scaph_host_power_microwatts", "Power measurement on the whole host"),
+               f"scaph_host_power_microwatts {sum(power) + 20_000_000:.0f}\n",
+               _family_header("scaph_process_cpu_usage_percentage", "CPU time consumed by the process")]
+        out.extend(f"scaph_process_cpu_usage_percentage{{{labels}}} {rng.uniform(0, 100):.2f}\n"
+                   for labels, _ in self.labels)
+        out.append(_family_header(PROCESS_POWER_METRIC, "Power consumption of the process in microwatts"))
+        out.extend(f"{PROCESS_POWER_METRIC}{{{labels}}} {uw:.0f}\n"
+                   for (labels, _), uw in zip(self.labels, power))
+        out.append(_family_header("scaph_process_memory_bytes", "Resident memory of the process"))
+        out.extend(f"scaph_process_memory_bytes{{{labels}}} {rng.randint(1, 1 << 32)}\n"
+                   for labels, _ in self.labels)
+        return "".join(out)
+
+
+def bench_parser(host_processes, rounds=20):
+    """Líneas/s del parser sobre un payload sintético de `host_processes` procesos"""
+    exporter = SyntheticExporter(host_processes=host_processes)
+    lines = exporter.payload().splitlines()
+    exporter.server.server_close()
+    print(f"📦 Payload: {len(lines)} líneas, {sum(map(len, lines)) / 1024:.0f} KiB")
+    for families in ([PROCESS_POWER_METRIC], None):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            count = sum(1 for _ in iter_samples(lines, families))
+        elapsed = (time.perf_counter() - start) / rounds
+        name = "sólo potencia" if families else "todas las familias"
+        print(f"  🔎 Parser ({name}): {count} muestras, {elapsed*1000:.2f} ms/payload, "
+              f"{len(lines)/elapsed:,.0f} líneas/s")
+
+
+def bench_sampler(host_processes, reads=10, slow=5.0):
+    """
+    Lecturas de PowerReader contra 3 exportadores: uno sano, uno lento
+    (`slow` s de latencia) y uno goteando bytes; ninguna lectura debería
+    superar mucho el timeout del cliente
+    """
+    exporters = {
+        "shard1": SyntheticExporter(host_processes=host_processes, seed=1),
+        "shard2": SyntheticExporter(host_processes=host_processes, seed=2, latency=slow),
+        "shard3": SyntheticExporter(host_processes=host_processes, seed=3,
+                                    failure_rate=1.0, failures=["drip"], drip_seconds=slow),
+    }
+    for exporter in exporters.values():
+        exporter.start()
+    reader = PowerReader({node: e.url for node, e in exporters.items()})
+    durations = []
+    try:
+        for _ in range(reads):
+            start = time.monotonic()
+            readings = reader.read()
+            durations.append(time.monotonic() - start)
+            ok = [node for node, r in readings.items() if r.processes]
+            print(f"  ⏱️  read(): {durations[-1]:.2f}s, con datos: {', '.join(ok) or '-'}")
+        print(f"  📊 read() mediana={statistics.median(durations):.2f}s "
+              f"max={max(durations):.2f}s (timeout {reader.client.timeout}s)")
+        reader.client.report()
+    finally:
+        reader.close()
+        for exporter in exporters.values():
+            exporter.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmark.exporter", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["serve", "bench"])
+    parser.add_argument("--port", type=int, default=9181)
+    parser.add_argument("--host-processes", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.0, help="segundos")
+    parser.add_argument("--jitter", type=float, default=0.0, help="segundos")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="0..1")
+    parser.add_argument("--failure", action="append", choices=FAILURES,
+                        help="tipo de fallo inyectado, repetible (por defecto todos)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reads", type=int, default=10, help="lecturas en bench")
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        bench_parser(args.host_processes)
+        bench_sampler(args.host_processes, args.reads)
+        return
+
+    exporter = SyntheticExporter(args.port, host_processes=args.host_processes,
+                                 latency=args.latency, jitter=args.jitter,
+                                 failure_rate=args.failure_rate,
+                                 failures=args.failure or FAILURES, seed=args.seed)
+    print(f"⚡ Exportador sintético en {exporter.url} (Ctrl-C para parar)")
+    try:
+        exporter.server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n📊 {exporter.requests} peticiones, fallos inyectados: {exporter.injected}")
+    finally:
+        exporter.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
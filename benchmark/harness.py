@@ -0,0 +1,189 @@
+"""
+Cluster sharded local para probar el benchmark sin los nodos 10.145.0.x
+
+    python -m benchmark.harness up [--dir /tmp/tpch-local] [--bin-dir DIR]
+    BENCH_CLUSTER=local python -m benchmark indices Q1 -n 2     # otra terminal
+
+Levanta en 127.0.0.1 un config server, 3 shards (replica sets de un
+miembro) y mongos en los puertos de config.LOCAL_PORTS, más un exportador
+/metrics falso por "nodo" (exporter.py) con el mismo reparto de procesos que
+el laboratorio: shard1 aloja también el config server y mongos. Ctrl-C lo
+para todo; los datos se conservan en --dir para la siguiente vez.
+
+Sin root no se vacía la caché del SO ni se reinician servicios, así que las
+queries "en frío" de indices/ aquí se ejecutan en caliente.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from pymongo import MongoClient
+from pymongo.errors import OperationFailure, PyMongoError
+
+from .config import LOCAL_EXPORTER_PORTS, LOCAL_PORTS
+from .exporter import ProcessExporter
+from .readiness import NotReady, check_member, wait_until_ready
+
+HOST = "127.0.0.1"
+SHARDS = ("shard1", "shard2", "shard3")
+
+# Procesos de cada nodo, como en 10.145.0.173 / .175 / .176
+NODE_PROCESSES = {
+    "shard1": ["shard1", "config", "mongos"],
+    "shard2": ["shard2"],
+    "shard3": ["shard3"]
+}
+
+_ALREADY_INITIALIZED = 23
+
+
+class LocalCluster:
+
+    def __init__(self, base_dir, bin_dir=None, cache_gb=0.25):
+        self.base_dir = base_dir
+        self.bin_dir = bin_dir
+        self.cache_gb = cache_gb
+        self.processes = {}
+        self.exporters = []
+
+    @property
+    def uri(self):
+        return f"mongodb://{HOST}:{LOCAL_PORTS['mongos']}/"
+
+    @property
+    def members(self):
+        return {name: f"{HOST}:{LOCAL_PORTS[name]}" for name in SHARDS + ("config",)}
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _binary(self, name):
+        path = os.path.join(self.bin_dir, name) if self.bin_dir else shutil.which(name)
+        if not path or not os.path.exists(path):
+            raise FileNotFoundError(f"No se encuentra {name} (usa --bin-dir)")
+        return path
+
+    def _spawn(self, name, args):
+        with open(os.path.join(self.base_dir, f"{name}.log"), "ab") as log:
+            self.processes[name] = subprocess.Popen(args, stdout=log, stderr=subprocess.STDOUT)
+        print(f"  🚀 {name} en :{LOCAL_PORTS[name]} (pid {self.processes[name].pid})")
+
+    def _start_mongod(self, name, role_flag):
+        dbpath = os.path.join(self.base_dir, name)
+        os.makedirs(dbpath, exist_ok=True)
+        self._spawn(name, [
+            self._binary("mongod"), role_flag, "--replSet", name,
+            "--port", str(LOCAL_PORTS[name]), "--bind_ip", HOST, "--dbpath", dbpath,
+            "--wiredTigerCacheSizeGB", str(self.cache_gb)
+        ])
+
+    def _initiate(self, name, timeout=60):
+        """replSetInitiate de un miembro y espera a que sea primario"""
+        host = self.members[name]
+        client = MongoClient(host, directConnection=True, serverSelectionTimeoutMS=timeout * 1000)
+        try:
+            config = {"_id": name, "members": [{"_id": 0, "host": host}]}
+            if name == "config":
+                config["configsvr"] = True
+            try:
+                client.admin.command("replSetInitiate", config)
+            except OperationFailure as e:
+                if e.code != _ALREADY_INITIALIZED:
+                    raise
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    check_member(client)
+                    print(f"  ✅ {name} primario")
+                    return
+                except (NotReady, PyMongoError):
+                    if time.monotonic() > deadline:
+                        raise
+                    time.sleep(0.5)
+        finally:
+            client.close()
+
+    def start(self):
+        print(f"🧪 Cluster local en {self.base_dir}")
+        os.makedirs(self.base_dir, exist_ok=True)
+        self._start_mongod("config", "--configsvr")
+        for name in SHARDS:
+            self._start_mongod(name, "--shardsvr")
+        for name in ("config",) + SHARDS:
+            self._initiate(name)
+
+        self._spawn("mongos", [
+            self._binary("mongos"), "--configdb", f"config/{self.members['config']}",
+            "--port", str(LOCAL_PORTS["mongos"]), "--bind_ip", HOST
+        ])
+        client = MongoClient(self.uri, serverSelectionTimeoutMS=60000)
+        try:
+            for name in SHARDS:
+                # addShard es idempotente si el shard ya estaba con el mismo host
+                client.admin.command("addShard", f"{name}/{self.members[name]}", name=name)
+        finally:
+            client.close()
+
+        self._start_exporters()
+        wait_until_ready(self.uri, self.members)
+        print(f"✅ Cluster local listo: {self.uri}")
+
+    def _start_exporters(self):
+        for node, names in NODE_PROCESSES.items():
+            processes = [(self.processes[name].pid, "mongos" if name == "mongos" else "mongod",
+                          " ".join(self.processes[name].args)) for name in names]
+            exporter = ProcessExporter(LOCAL_EXPORTER_PORTS[node], processes, HOST).start()
+            self.exporters.append(exporter)
+            print(f"  ⚡ Exportador {node}: {exporter.url}")
+
+    def stop(self):
+        for exporter in self.exporters:
+            exporter.stop()
+        self.exporters = []
+        # mongos primero, el config server el último
+        for name in ["mongos"] + list(SHARDS) + ["config"]:
+            proc = self.processes.pop(name, None)
+            if proc is None:
+                continue
+            proc.terminate()
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+            print(f"  🛑 {name} detenido")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmark.harness", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["up"])
+    parser.add_argument("--dir", default=os.path.join(tempfile.gettempdir(), "tpch-local"))
+    parser.add_argument("--bin-dir", help="carpeta con mongod y mongos (por defecto el PATH)")
+    parser.add_argument("--cache-gb", type=float, default=0.25,
+                        help="tamaño de la caché WiredTiger de cada mongod")
+    args = parser.parse_args(argv)
+
+    cluster = LocalCluster(args.dir, args.bin_dir, args.cache_gb)
+    try:
+        cluster.start()
+        print("💡 En otra terminal: BENCH_CLUSTER=local python -m benchmark ...  (Ctrl-C para parar)")
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print()
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+    finally:
+        cluster.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Perfiles de índices declarativos por esquema
+
+    python -m benchmark.indexes list                  # perfiles disponibles
+    python -m benchmark.indexes build indices tpch    # crea y verifica
+    python -m benchmark.indexes verify indices tpch   # sólo verifica
+
+El runner aplica el perfil de config.INDEX_PROFILES (o --indexes) antes de
+la primera query de cada base de datos: crea los índices que falten (todas
+las colecciones a la vez; mongos construye cada índice en paralelo en los
+shards), rehace los que tengan el nombre pero otra clave y verifica nombre y
+clave de todos. Una query puede declarar además los índices sin los que su
+plan no tiene sentido (Query.indexes); se crean y verifican igual, con
+cualquier perfil, y los que no son del perfil se borran al acabar su serie.
+Los índices reales de la base de datos, también los que no
+están en el perfil, se guardan en <salida>.metadata.json junto a las muestras.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from pymongo import IndexModel, MongoClient
+
+from .config import MONGOS_URI
+from .queries import DATABASES
+
+
+class IndexMismatch(Exception):
+    pass
+
+
+# esquema -> perfil -> {colección: [(nombre, [(campo, dirección), ...])]}
+PROFILES = {
+    "indices": {
+        "none": {},
+        "tpch": {
+            "lineitems": [
+                ("l_orderkey_1", [("l_orderkey", 1)]),
+                ("l_partkey_1", [("l_partkey", 1)]),
+                ("l_shipdate_1", [("l_shipdate", 1)]),
+            ],
+            "orders": [
+                ("o_custkey_1", [("o_custkey", 1)]),
+                ("o_orderdate_1", [("o_orderdate", 1)]),
+            ],
+            "partsupps": [("ps_partkey_1", [("ps_partkey", 1)])],
+            "parts": [("p_type_1", [("p_type", 1)])],
+        },
+        # tpch + las claves foráneas que usan los $lookup de indices/
+        "lookups": {
+            "lineitems": [
+                ("l_orderkey_1", [("l_orderkey", 1)]),
+                ("l_partkey_1", [("l_partkey", 1)]),
+                ("l_suppkey_1", [("l_suppkey", 1)]),
+                ("l_shipdate_1", [("l_shipdate", 1)]),
+            ],
+            "orders": [
+                ("o_orderkey_1", [("o_orderkey", 1)]),
+                ("o_custkey_1", [("o_custkey", 1)]),
+                ("o_orderdate_1", [("o_orderdate", 1)]),
+            ],
+            "partsupps": [("ps_partkey_1", [("ps_partkey", 1)])],
+            "parts": [("p_type_1", [("p_type", 1)])],
+            "customers": [("c_custkey_1", [("c_custkey", 1)])],
+            "suppliers": [("s_suppkey_1", [("s_suppkey", 1)])],
+            "nations": [("n_nationkey_1", [("n_nationkey", 1)])],
+            "regions": [("r_regionkey_1", [("r_regionkey", 1)])],
+        },
+    },
+    "sin_diseno": {
+        "none": {},
+        "embedded": {
+            "orders_with_lineitems": [
+                ("o_custkey_1", [("o_custkey", 1)]),
+                ("o_orderdate_1", [("o_orderdate", 1)]),
+                ("lineitems.l_shipdate_1", [("lineitems.l_shipdate", 1)]),
+                ("lineitems.l_partkey_1", [("lineitems.l_partkey", 1)]),
+            ],
+            "parts_with_suppliers": [
+                ("p_type_1", [("p_type", 1)]),
+                ("suppliers.s_suppkey_1", [("suppliers.s_suppkey", 1)]),
+            ],
+        },
+    },
+}
+
+SCHEMAS_BY_DATABASE = {database: schema for schema, database in DATABASES.items()}
+
+
+def profile_for(database, name):
+    """{colección: [(nombre, clave)]} del perfil `name` para `database`"""
+    profiles = PROFILES[SCHEMAS_BY_DATABASE[database]]
+    if name not in profiles:
+        raise KeyError(f"Perfil de índices desconocido para {database}: {name} "
+                       f"(hay {', '.join(profiles)})")
+    return profiles[name]
+
+
+def _key(spec):
+    """Patrón de clave comparable: [(campo, 1 | -1 | "text" ...)]"""
+    return [(field, int(value) if isinstance(value, (int, float)) else value)
+            for field, value in spec.items()]
+
+
+def existing_indexes(db):
+    """{colección: {nombre: clave}} de todas las colecciones de `db`"""
+    return {name: {ix["name"]: _key(ix["key"]) for ix in db[name].list_indexes()}
+            for name in sorted(db.list_collection_names())}
+
+
+def _build_collection(db, collection, specs, current):
+    t0 = time.monotonic()
+    for name, key in specs:
+        if name in current and current[name] != key:
+            print(f"  ♻️  {collection}.{name}: clave {current[name]} → {key}, se reconstruye")
+            db[collection].drop_index(name)
+    missing = [IndexModel(key, name=name) for name, key in specs if current.get(name) != key]
+    if missing:
+        # Un solo createIndexes: todos los índices de la colección en un recorrido
+        db[collection].create_indexes(missing)
+    return collection, len(missing), time.monotonic() - t0
+
+
+def build(client, database, profile):
+    """Crea (en paralelo por colección) los índices del perfil que falten"""
+    build_specs(client, database, profile_for(database, profile))
+
+
+def build_specs(client, database, specs):
+    """Crea los índices de `specs` ({colección: [(nombre, clave)]}) que falten"""
+    db = client[database]
+    current = existing_indexes(db)
+    with ThreadPoolExecutor(max_workers=max(1, len(specs))) as pool:
+        futures = [pool.submit(_build_collection, db, collection, indexes,
+                               current.get(collection, {}))
+                   for collection, indexes in specs.items()]
+        for future in futures:
+            collection, created, elapsed = future.result()
+            if created:
+                print(f"  🔨 {database}.{collection}: {created} índices en {elapsed:.1f}s")
+
+
+def verify(client, database, profile):
+    """
+    Comprueba nombre y clave de cada índice del perfil y devuelve los
+    índices reales; IndexMismatch si falta alguno o su clave no coincide
+    """
+    return verify_specs(client, database, profile_for(database, profile), f"el perfil {profile}")
+
+
+def verify_specs(client, database, specs, what):
+    current = existing_indexes(client[database])
+    problems = []
+    for collection, indexes in specs.items():
+        found = current.get(collection, {})
+        for name, key in indexes:
+            if name not in found:
+                problems.append(f"{collection}.{name} no existe")
+            elif found[name] != key:
+                problems.append(f"{collection}.{name} tiene clave {found[name]}, no {key}")
+    if problems:
+        raise IndexMismatch(f"{database} no cumple {what}: " + "; ".join(problems))
+    return current
+
+
+def ensure(client, database, specs, owner):
+    """
+    Construye y verifica los índices que declara una query (Query.indexes),
+    sea cual sea el perfil; devuelve los índices reales
+    """
+    build_specs(client, database, specs)
+    current = verify_specs(client, database, specs, f"los índices de {owner}")
+    names = [f"{collection}.{name}" for collection, indexes in specs.items() for name, _ in indexes]
+    print(f"  ✅ Índices de {owner} verificados: {', '.join(names)}")
+    return current
+
+
+def provision(client, database, profile):
+    """Construye y verifica el perfil; devuelve los metadatos de la configuración"""
+    print(f"🗂️  Índices de {database}: perfil {profile}")
+    build(client, database, profile)
+    current = verify(client, database, profile)
+    expected = {(collection, name) for collection, specs in profile_for(database, profile).items()
+                for name, _ in specs}
+    extra = [f"{collection}.{name}" for collection, indexes in current.items()
+             for name in indexes if name != "_id_" and (collection, name) not in expected]
+    if extra:
+        print(f"  ⚠️  Índices fuera del perfil (se registran): {', '.join(extra)}")
+    print(f"  ✅ Perfil {profile} verificado ({len(expected)} índices)")
+    return describe(database, profile, current)
+
+
+def drop_specs(client, database, specs):
+    """Borra los índices de `specs` ({colección: [(nombre, clave)]}) que existan"""
+    db = client[database]
+    current = existing_indexes(db)
+    for collection, indexes in specs.items():
+        for name, _ in indexes:
+            if name in current.get(collection, {}):
+                db[collection].drop_index(name)
+                print(f"  🗑️  {database}.{collection}.{name} borrado")
+
+
+def describe(database, profile, current):
+    """Metadatos de una configuración de índices para el JSON de resultados"""
+    return {
+        "database": database,
+        "index_profile": profile,
+        "indexes": {collection: [{"name": name, "key": key} for name, key in indexes.items()]
+                    for collection, indexes in current.items()},
+    }
+
+
+def write_metadata(path, metadata):
+    """Escribe `metadata` (más la fecha) en JSON de forma atómica"""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(dict(metadata, updated=datetime.now().isoformat()), f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_metadata(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmark.indexes", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["list", "build", "verify"])
+    parser.add_argument("schema", nargs="?", choices=sorted(PROFILES))
+    parser.add_argument("profile", nargs="?")
+    parser.add_argument("--uri", default=MONGOS_URI)
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for schema, profiles in PROFILES.items():
+            for name, specs in profiles.items():
+                indexes = [f"{collection}.{ix}" for collection, items in specs.items()
+                           for ix, _ in items]
+                print(f"{schema:<11} {name:<9} {', '.join(indexes) or '(sólo _id y claves de shard)'}")
+        return
+    if not args.schema or not args.profile:
+        parser.error(f"{args.command} necesita esquema y perfil")
+
+    client = MongoClient(args.uri)
+    try:
+        database = DATABASES[args.schema]
+        if args.command == "build":
+            provision(client, database, args.profile)
+        else:
+            verify(client, database, args.profile)
+            print(f"✅ {database} cumple el perfil {args.profile}")
+    except IndexMismatch as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
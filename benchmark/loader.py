@@ -0,0 +1,257 @@
+"""
+Carga de datos TPC-H generados (datagen.py) en uno o ambos esquemas
+
+    python -m benchmark.loader --sf 1                      # los dos esquemas
+    python -m benchmark.loader --sf 10 --schema indices --workers 16 --drop
+
+- sin_diseno -> tpch_optimized: orders_with_lineitems y parts_with_suppliers
+  embebidos, customers/suppliers con el nombre de su nación.
+- indices -> tpch_sin_diseno: tablas normalizadas.
+
+En los dos esquemas las fechas son BSON Date (ver dates.py).
+
+Antes de cargar, cada colección grande se fragmenta por su clave de shard
+en tantos rangos como particiones de trabajo y los chunks se reparten entre
+los shards, así que cada proceso escribe en un único shard sin que el
+balancer mueva nada. Los _id son las claves TPC-H (enteros).
+"""
+import argparse
+import os
+import time
+from multiprocessing import Pool
+
+from bson.min_key import MinKey
+from pymongo import MongoClient
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from . import datagen
+from .config import MONGOS_URI
+from .queries import DATABASES, indices, sin_diseno
+
+BATCH = 1000
+
+# (base de datos, colección) -> clave de shard (rangos); el resto sin shardear
+SHARD_KEYS = {
+    (sin_diseno.DATABASE, "orders_with_lineitems"): "o_orderkey",
+    (sin_diseno.DATABASE, "parts_with_suppliers"): "p_partkey",
+    (sin_diseno.DATABASE, "customers"): "c_custkey",
+    (indices.DATABASE, "orders"): "o_orderkey",
+    (indices.DATABASE, "lineitems"): "l_orderkey",
+    (indices.DATABASE, "parts"): "p_partkey",
+    (indices.DATABASE, "partsupps"): "ps_partkey",
+    (indices.DATABASE, "customers"): "c_custkey",
+}
+
+# Tabla generada -> colecciones que alimenta en cada esquema
+COLLECTIONS = {
+    "orders": {"sin_diseno": ["orders_with_lineitems"], "indices": ["orders", "lineitems"]},
+    "part": {"sin_diseno": ["parts_with_suppliers"], "indices": ["parts", "partsupps"]},
+    "customer": {"sin_diseno": ["customers"], "indices": ["customers"]},
+    "supplier": {"sin_diseno": ["suppliers"], "indices": ["suppliers"]},
+}
+
+
+NATION_NAMES = {key: name for key, (name, _) in enumerate(datagen.NATIONS)}
+
+
+def documents(table, row, schema, sf, seed):
+    """{colección: [documentos]} de una fila generada en el esquema `schema`"""
+    if table == "orders":
+        order, lineitems = row
+        if schema == "indices":
+            return {
+                "orders": [dict(order, _id=order["o_orderkey"])],
+                "lineitems": [dict(li, _id=li["l_orderkey"] * 8 + li["l_linenumber"])
+                              for li in lineitems],
+            }
+        return {"orders_with_lineitems": [dict(order, _id=order["o_orderkey"], lineitems=lineitems)]}
+
+    if table == "part":
+        part, partsupps = row
+        if schema == "indices":
+            return {
+                "parts": [dict(part, _id=part["p_partkey"])],
+                "partsupps": [dict(ps, _id=ps["ps_partkey"] * 4 + i)
+                              for i, ps in enumerate(partsupps)],
+            }
+        suppliers = []
+        for ps in partsupps:
+            supplier = datagen.supplier(sf, ps["ps_suppkey"], seed)
+            suppliers.append(dict(supplier, s_nation_name=NATION_NAMES[supplier["s_nationkey"]],
+                                  ps_availqty=ps["ps_availqty"],
+                                  ps_supplycost=ps["ps_supplycost"],
+                                  ps_comment=ps["ps_comment"]))
+        return {"parts_with_suppliers": [dict(part, _id=part["p_partkey"], suppliers=suppliers)]}
+
+    if table == "customer":
+        doc = dict(row, _id=row["c_custkey"])
+        if schema == "sin_diseno":
+            doc["c_nation_name"] = NATION_NAMES[row["c_nationkey"]]
+        return {"customers": [doc]}
+
+    doc = dict(row, _id=row["s_suppkey"])
+    if schema == "sin_diseno":
+        doc["s_nation_name"] = NATION_NAMES[row["s_nationkey"]]
+    return {"suppliers": [doc]}
+
+
+def shard_key_value(table, index):
+    """Valor de la clave de shard de la fila `index` de `table`"""
+    return datagen.order_key(index) if table == "orders" else index + 1
+
+
+def partitions(total, count):
+    """[start, stop) de `count` rangos contiguos que cubren `total` filas"""
+    count = max(1, min(count, total))
+    bounds = [total * i // count for i in range(count + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def presplit(client, database, collection, key, boundaries):
+    """
+    Shardea `collection` por rangos de `key`, la corta en `boundaries` y
+    reparte los chunks entre los shards por turnos
+    """
+    try:
+        shards = [s["_id"] for s in client.admin.command("listShards")["shards"]]
+    except OperationFailure:
+        print(f"  ⚠️  {database}.{collection}: no es un cluster sharded, sin pre-split")
+        return
+    ns = f"{database}.{collection}"
+    client.admin.command("enableSharding", database)
+    try:
+        client.admin.command("shardCollection", ns, key={key: 1})
+    except OperationFailure as e:
+        if "already" not in str(e).lower():
+            raise
+        print(f"  ⚠️  {ns} ya estaba shardeada: se mantienen sus chunks")
+        return
+    for value in boundaries:
+        client.admin.command("split", ns, middle={key: value})
+    # El chunk i ([boundaries[i-1], boundaries[i])) lo escribe la partición i
+    for i, value in enumerate([MinKey()] + list(boundaries)):
+        try:
+            client.admin.command("moveChunk", ns, find={key: value}, to=shards[i % len(shards)])
+        except OperationFailure as e:
+            if "already" not in str(e).lower():
+                raise
+    print(f"  🧩 {ns}: {len(boundaries) + 1} chunks en {len(shards)} shards")
+
+
+_client = None
+
+
+def _worker_client(uri):
+    global _client
+    if _client is None:
+        _client = MongoClient(uri, w=1)
+    return _client
+
+
+def _flush(db, collection, docs):
+    if not docs:
+        return 0
+    try:
+        db[collection].insert_many(docs, ordered=False, bypass_document_validation=True)
+    except BulkWriteError as e:
+        # Reintentos de una carga interrumpida: los duplicados se ignoran
+        if any(err["code"] != 11000 for err in e.details["writeErrors"]):
+            raise
+    return len(docs)
+
+
+def load_partition(task):
+    """Genera y escribe las filas [start, stop) de una tabla en los esquemas pedidos"""
+    uri, table, start, stop, schemas, sf, seed = task
+    client = _worker_client(uri)
+    t0 = time.monotonic()
+    buffers = {}
+    written = 0
+    for row in datagen.generate(table, sf, start, stop, seed):
+        for schema in schemas:
+            db = DATABASES[schema]
+            for collection, docs in documents(table, row, schema, sf, seed).items():
+                buffer = buffers.setdefault((db, collection), [])
+                buffer.extend(docs)
+                if len(buffer) >= BATCH:
+                    written += _flush(client[db], collection, buffer)
+                    buffer.clear()
+    for (db, collection), buffer in buffers.items():
+        written += _flush(client[db], collection, buffer)
+    return table, stop - start, written, time.monotonic() - t0
+
+
+def load(uri=MONGOS_URI, sf=1, schemas=("sin_diseno", "indices"), workers=None,
+         parts_per_worker=2, seed=0, drop=False):
+    workers = workers or os.cpu_count()
+    counts = datagen.scale(sf)
+    client = MongoClient(uri)
+    try:
+        for schema in schemas:
+            db = DATABASES[schema]
+            if drop:
+                print(f"🗑️  Borrando {db}")
+                client.drop_database(db)
+            _flush(client[db], "nations", [dict(n, _id=n["n_nationkey"]) for n in datagen.nations()])
+            _flush(client[db], "regions", [dict(r, _id=r["r_regionkey"]) for r in datagen.regions()])
+
+        tasks = []
+        for table, total in counts.items():
+            ranges = partitions(total, workers * parts_per_worker)
+            boundaries = [shard_key_value(table, start) for start, _ in ranges[1:]]
+            for schema in schemas:
+                db = DATABASES[schema]
+                for collection in COLLECTIONS[table][schema]:
+                    key = SHARD_KEYS.get((db, collection))
+                    if key:
+                        presplit(client, db, collection, key, boundaries)
+            tasks += [(uri, table, start, stop, tuple(schemas), sf, seed) for start, stop in ranges]
+        try:
+            client.admin.command("balancerStop")
+        except OperationFailure:
+            pass
+    finally:
+        client.close()
+
+    # Las tablas grandes primero para no acabar con un solo proceso ocupado
+    order = {"orders": 0, "part": 1, "customer": 2, "supplier": 3}
+    tasks.sort(key=lambda t: order[t[1]])
+    print(f"🚚 Cargando SF{sf} en {', '.join(DATABASES[s] for s in schemas)}: "
+          f"{len(tasks)} particiones, {workers} procesos")
+    start = time.monotonic()
+    documents_written = 0
+    with Pool(workers) as pool:
+        for done, (table, rows, written, elapsed) in enumerate(
+                pool.imap_unordered(load_partition, tasks), 1):
+            documents_written += written
+            total_elapsed = time.monotonic() - start
+            print(f"  📦 [{done}/{len(tasks)}] {table}: {rows} filas, {written} documentos "
+                  f"en {elapsed:.1f}s — total {documents_written / total_elapsed:,.0f} docs/s")
+
+    client = MongoClient(uri)
+    try:
+        client.admin.command("balancerStart")
+    except OperationFailure:
+        pass
+    finally:
+        client.close()
+    print(f"✅ {documents_written} documentos en {time.monotonic() - start:.1f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmark.loader", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sf", type=float, default=1, help="factor de escala TPC-H")
+    parser.add_argument("--schema", choices=["sin_diseno", "indices", "both"], default="both")
+    parser.add_argument("--workers", type=int, default=None, help="procesos (por defecto nº de CPUs)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--drop", action="store_true", help="borra antes las bases de datos")
+    parser.add_argument("--uri", default=MONGOS_URI)
+    args = parser.parse_args(argv)
+
+    schemas = ("sin_diseno", "indices") if args.schema == "both" else (args.schema,)
+    load(args.uri, args.sf, schemas, args.workers, seed=args.seed, drop=args.drop)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Estrategia de $lookup: correlacionados con $expr o por índice
+
+    python -m benchmark.lookups sin_diseno Q9 Q20 --dry-run             # sólo reescritura
+    python -m benchmark.lookups sin_diseno Q13 Q20 --strategy indexed   # explain + uso de índices
+
+Un $lookup con let/pipeline cuyo sub-pipeline empieza por ($unwind de un
+array y) un $match con $expr {$eq: ["$campo", "$$var"]} no puede usar índices:
+se evalúa documento a documento tras desenrollar. Con la estrategia
+"indexed" (--lookups indexed) esos $lookup se reescriben a la forma concisa
+de MongoDB 5.0+, localField/foreignField + pipeline, de modo que la igualdad
+va por el índice (multikey si es un campo del array, p.ej.
+lineitems.l_partkey_1 u o_custkey_1 del perfil "embedded", que se elige con
+--indexes embedded; sin él la forma concisa no cambia el resultado pero el
+$lookup sigue recorriendo la colección). Las comparaciones con literales
+sobre el array se adelantan a un $match con $elemMatch antes del $unwind. El
+sub-pipeline original se conserva, así que el resultado es el mismo siempre
+que el campo local sea escalar.
+
+Por defecto (config.LOOKUP_STRATEGY) es "correlated": las series ya medidas,
+también indices/ Q4, mantienen su plan y no exigen MongoDB 5.0.
+
+El informe ejecuta las queries con explain "executionStats" (es decir,
+completas) y muestra por $lookup los índices usados y los collection scans.
+"""
+import argparse
+
+from pymongo import MongoClient
+
+from .config import LOOKUP_STRATEGY, MONGOS_URI
+from .queries import DATABASES, get_queries
+
+STRATEGIES = ("indexed", "correlated")
+
+_FLIPPED = {"$eq": "$eq", "$gt": "$lt", "$gte": "$lte", "$lt": "$gt", "$lte": "$gte"}
+
+
+def _is_reference(value):
+    return isinstance(value, str) and value.startswith("$")
+
+
+def _field(expr, array):
+    """"$lineitems.l_partkey" -> "l_partkey" (o "$l_orderkey" sin array)"""
+    prefix = f"${array}." if array else "$"
+    if isinstance(expr, str) and expr.startswith(prefix) and not expr.startswith("$$"):
+        return expr[len(prefix):]
+    return None
+
+
+def rewrite_lookup(spec):
+    """
+    Versión indexable de un $lookup correlacionado, o el mismo `spec` si no
+    sigue el patrón ([$unwind,] $match $expr con igualdad a una variable de let)
+    """
+    pipeline = spec.get("pipeline")
+    let = spec.get("let", {})
+    if "localField" in spec or not pipeline or not let:
+        return spec
+    array = None
+    position = 0
+    if "$unwind" in pipeline[0]:
+        unwind = pipeline[0]["$unwind"]
+        path = unwind if isinstance(unwind, str) else unwind["path"]
+        array = path[1:]
+        position = 1
+    if len(pipeline) <= position or "$expr" not in pipeline[position].get("$match", {}):
+        return spec
+
+    expr = pipeline[position]["$match"]["$expr"]
+    conditions = expr["$and"] if "$and" in expr else [expr]
+    local = foreign = None
+    element = {}
+    for condition in conditions:
+        if len(condition) != 1:
+            continue
+        (op, args), = condition.items()
+        if op not in _FLIPPED or not isinstance(args, list) or len(args) != 2:
+            continue
+        left, right = args
+        if _field(left, array) is None and _field(right, array) is not None:
+            op, left, right = _FLIPPED[op], right, left
+        field = _field(left, array)
+        if field is None:
+            continue
+        if op == "$eq" and local is None and isinstance(right, str) and right.startswith("$$"):
+            source = let.get(right[2:])
+            if _field(source, None) is not None:
+                local = source[1:]
+                foreign = f"{array}.{field}" if array else field
+                continue
+        if array and not _is_reference(right):
+            element.setdefault(field, {})[op] = right
+    if local is None:
+        return spec
+
+    prefilter = [{"$match": {array: {"$elemMatch": element}}}] if element else []
+    return dict(spec, localField=local, foreignField=foreign, pipeline=prefilter + pipeline)
+
+
+def rewrite_lookups(pipeline):
+    """Copia del pipeline con los $lookup (también anidados) en forma indexable"""
+    stages = []
+    for stage in pipeline:
+        if "$lookup" in stage and "pipeline" in stage["$lookup"]:
+            spec = dict(stage["$lookup"], pipeline=rewrite_lookups(stage["$lookup"]["pipeline"]))
+            stage = {"$lookup": rewrite_lookup(spec)}
+        elif "$facet" in stage:
+            stage = {"$facet": {name: rewrite_lookups(branch)
+                                for name, branch in stage["$facet"].items()}}
+        elif "$unionWith" in stage and isinstance(stage["$unionWith"], dict) \
+                and "pipeline" in stage["$unionWith"]:
+            stage = {"$unionWith": dict(stage["$unionWith"],
+                                        pipeline=rewrite_lookups(stage["$unionWith"]["pipeline"]))}
+        stages.append(stage)
+    return stages
+
+
+def apply(pipeline, strategy=LOOKUP_STRATEGY):
+    if strategy == "indexed":
+        return rewrite_lookups(pipeline)
+    if strategy != "correlated":
+        raise ValueError(f"Estrategia de $lookup desconocida: {strategy}")
+    return pipeline
+
+
+def rewritten(pipeline):
+    """[(from, as, localField, foreignField)] de los $lookup que cambia la reescritura"""
+    found = []
+
+    def walk(original, new):
+        for before, after in zip(original, new):
+            if "$lookup" in before:
+                if "localField" in after["$lookup"] and "localField" not in before["$lookup"]:
+                    spec = after["$lookup"]
+                    found.append((spec["from"], spec["as"], spec["localField"], spec["foreignField"]))
+                if "pipeline" in before["$lookup"]:
+                    walk(before["$lookup"]["pipeline"], after["$lookup"]["pipeline"])
+            elif "$facet" in before:
+                for name in before["$facet"]:
+                    walk(before["$facet"][name], after["$facet"][name])
+
+    walk(pipeline, rewrite_lookups(pipeline))
+    return found
+
+
+class _RecordingCollection:
+
+    def __init__(self, calls, collection):
+        self._calls = calls
+        self._collection = collection
+
+    def aggregate(self, pipeline, **kwargs):
+        self._calls.append((self._collection.name, pipeline))
+        return self._collection.aggregate(pipeline, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+
+class _RecordingDatabase:
+    """Base de datos que anota los aggregate() de las queries de varios pasos"""
+
+    def __init__(self, db):
+        self._db = db
+        self.calls = []
+
+    def __getitem__(self, name):
+        return _RecordingCollection(self.calls, self._db[name])
+
+    def __getattr__(self, name):
+        return self[name]
+
+
+def aggregations(query, db, strategy=LOOKUP_STRATEGY):
+    """[(colección, pipeline)] que ejecuta la query (las de `run` ejecutándola)"""
+    if query.pipeline is not None:
+        return [(query.collection, apply(query.pipeline, strategy))]
+    recorder = _RecordingDatabase(db)
+    query.run(recorder)
+    return recorder.calls
+
+
+def _walk(node, visit):
+    if isinstance(node, dict):
+        visit(node)
+        for value in node.values():
+            _walk(value, visit)
+    elif isinstance(node, list):
+        for value in node:
+            _walk(value, visit)
+
+
+def index_usage(explain):
+    """
+    ({(from, as): estadísticas sumadas entre shards}, {índices/COLLSCAN del
+    plan principal}) a partir de un explain "executionStats"
+    """
+    lookups = {}
+    scans = set()
+
+    def visit(node):
+        if "$lookup" in node and isinstance(node["$lookup"], dict):
+            spec = node["$lookup"]
+            stats = lookups.setdefault((spec.get("from"), spec.get("as")), {
+                "indexes": set(), "collection_scans": 0, "keys_examined": 0, "docs_examined": 0
+            })
+            stats["indexes"].update(node.get("indexesUsed", []))
+            stats["collection_scans"] += node.get("collectionScans", 0)
+            stats["keys_examined"] += node.get("totalKeysExamined", 0)
+            stats["docs_examined"] += node.get("totalDocsExamined", 0)
+        elif node.get("stage") == "IXSCAN":
+            scans.add(node.get("indexName"))
+        elif node.get("stage") == "COLLSCAN":
+            scans.add("COLLSCAN")
+
+    _walk(explain, visit)
+    return lookups, scans
+
+
+def report(client, query, strategy=LOOKUP_STRATEGY):
+    """Explain de cada agregación de la query; imprime y devuelve el uso de índices"""
+    db = client[query.database]
+    results = []
+    for collection, pipeline in aggregations(query, db, strategy):
+        explain = db.command("explain", {"aggregate": collection, "pipeline": pipeline,
+                                         "cursor": {}}, verbosity="executionStats")
+        lookups, scans = index_usage(explain)
+        print(f"  🔎 {query.name} → {collection}: {', '.join(sorted(scans)) or 'sin plan de acceso'}")
+        for (source, alias), stats in lookups.items():
+            used = bool(stats["indexes"])
+            mark = "✅" if used and not stats["collection_scans"] else "❌"
+            print(f"     {mark} $lookup {source} → {alias}: "
+                  f"índices {', '.join(sorted(stats['indexes'])) or 'ninguno'}, "
+                  f"{stats['collection_scans']} collection scans, "
+                  f"{stats['keys_examined']} claves / {stats['docs_examined']} docs examinados")
+            results.append({"query": query.name, "collection": collection, "from": source,
+                            "as": alias, "index_used": used, **stats})
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmark.lookups", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("schema", choices=sorted(DATABASES))
+    parser.add_argument("queries", nargs="*", help="Q9 Q20 ... (por defecto todas)")
+    parser.add_argument("--strategy", choices=STRATEGIES, default=LOOKUP_STRATEGY)
+    parser.add_argument("--dry-run", action="store_true",
+                        help="sólo muestra qué $lookup se reescriben, sin conectarse")
+    parser.add_argument("--uri", default=MONGOS_URI)
+    args = parser.parse_args(argv)
+
+    queries = get_queries(args.schema, args.queries)
+    if args.dry_run:
+        for query in queries:
+            if query.pipeline is None:
+                print(f"  ⏭️  {query.name}: query de varios pasos (run), sin pipeline fijo")
+                continue
+            for source, alias, local, foreign in rewritten(query.pipeline):
+                print(f"  🔁 {query.name}: $lookup {source} → {alias} por {local} = {foreign}")
+        return
+
+    client = MongoClient(args.uri)
+    try:
+        print(f"🧭 $lookup {args.strategy} en {DATABASES[args.schema]}")
+        for query in queries:
+            report(client, query, args.strategy)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Lectura de potencia desde los exporters de Scaphandre
+"""
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import CONFIG_SERVER_MARKERS, ENDPOINTS
+from .prometheus import iter_samples
+
+PROCESS_POWER_METRIC = "scaph_process_power_consumption_microwatts"
+MONGODB_EXES = {"mongod", "mongos"}
+
+# microwatts: potencia MongoDB del nodo; monotonic: instante de la lectura
+# (punto medio de la petición HTTP, reloj time.monotonic()); processes:
+# tupla de ProcessPower con el desglose por proceso
+Reading = namedtuple("Reading", ["microwatts", "monotonic", "processes"])
+ProcessPower = namedtuple("ProcessPower", ["pid", "role", "microwatts"])
+
+
+class EndpointStats:
+    """Latencias de scrape de un endpoint (últimas `window` muestras)"""
+
+    def __init__(self, window=1000):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+
+    def add(self, latency, ok=True):
+        self.count += 1
+        if not ok:
+            self.errors += 1
+        self.total += latency
+        self.max = max(self.max, latency)
+        self.recent.append(latency)
+
+    def p95(self):
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class ScrapeClient:
+    """
+    Cliente HTTP persistente para los /metrics: una Session keep-alive por
+    endpoint (se reutiliza la conexión TCP entre muestras) y estadísticas
+    de latencia por endpoint.
+    """
+
+    def __init__(self, endpoints=ENDPOINTS, timeout=2):
+        self.timeout = timeout
+        self.sessions = {}
+        self.stats = {}
+        self._lock = threading.Lock()
+        for url in endpoints.values():
+            session = requests.Session()
+            session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+            self.sessions[url] = session
+            self.stats[url] = EndpointStats()
+
+    def lines(self, endpoint):
+        """
+        Genera las líneas del payload según llegan (stream=True). La latencia
+        registrada cubre hasta que el consumidor termina o cierra el generador.
+        """
+        session = self.sessions.get(endpoint) or requests
+        t0 = time.monotonic()
+        # `timeout` de requests es por read(): un exporter que envía a goteo
+        # nunca lo agota, así que además se impone un plazo al scrape entero
+        deadline = t0 + self.timeout
+        ok = False
+        try:
+            with session.get(endpoint, timeout=self.timeout, stream=True) as resp:
+                resp.raise_for_status()
+                for line in resp.iter_lines(decode_unicode=True):
+                    if time.monotonic() > deadline:
+                        raise requests.Timeout(f"scrape de más de {self.timeout}s")
+                    yield line
+                ok = True
+        except GeneratorExit:
+            # Corte anticipado del parser: el scrape fue correcto
+            ok = True
+            raise
+        finally:
+            if endpoint in self.stats:
+                with self._lock:
+                    self.stats[endpoint].add(time.monotonic() - t0, ok)
+
+    def connections_opened(self, endpoint):
+        """Conexiones TCP abiertas hasta ahora contra `endpoint`"""
+        adapter = self.sessions[endpoint].get_adapter(endpoint)
+        host = urlparse(endpoint)
+        # requests puede crear el pool con pool_kwargs propios, así que se
+        # buscan por host/puerto en vez de pedir (y crear) uno nuevo
+        pools = adapter.poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys()
+                   if key.key_host == host.hostname and key.key_port == host.port)
+
+    def report(self):
+        print("  🌐 Scrapes de métricas (acumulado del proceso):")
+        with self._lock:
+            for url, st in self.stats.items():
+                if not st.count:
+                    continue
+                print(f"     {url}: {st.count} scrapes, "
+                      f"{self.connections_opened(url)} conexiones, "
+                      f"{st.errors} errores, "
+                      f"media={st.total/st.count*1000:.1f}ms "
+                      f"p95={st.p95()*1000:.1f}ms max={st.max*1000:.1f}ms")
+
+    def close(self):
+        for session in self.sessions.values():
+            session.close()
+
+
+# Cliente sin pool para llamadas sueltas a get_power() fuera del sampler
+_default_client = ScrapeClient({})
+
+
+def is_mongodb_process(labels):
+    """mongod/mongos según el label `exe` (no basta con que aparezca en cmdline)"""
+    exe = labels.get("exe", "").rsplit("/", 1)[-1]
+    return exe in MONGODB_EXES
+
+
+def process_role(labels):
+    """mongos, config o shard a partir de exe/cmdline"""
+    exe = labels.get("exe", "").rsplit("/", 1)[-1]
+    if exe == "mongos":
+        return "mongos"
+    cmdline = labels.get("cmdline", "")
+    if any(marker in cmdline for marker in CONFIG_SERVER_MARKERS):
+        return "config"
+    return "shard"
+
+
+def get_process_power(endpoint, client=None):
+    """Lista de ProcessPower (pid, rol, µW) de los procesos MongoDB del nodo"""
+    if client is None:
+        client = _default_client
+    lines = client.lines(endpoint)
+    try:
+        processes = []
+        for sample in iter_samples(lines, [PROCESS_POWER_METRIC]):
+            if is_mongodb_process(sample.labels):
+                pid = int(sample.labels.get("pid", 0) or 0)
+                processes.append(ProcessPower(pid, process_role(sample.labels),
+                                              sample.value))
+        return processes
+    except Exception as e:
+        print(f"⚠️  Error obteniendo métricas de {endpoint}: {e}")
+        return []
+    finally:
+        lines.close()
+
+
+def get_power(endpoint, client=None):
+    """
+    Obtiene la potencia TOTAL (µW) de todos los procesos MongoDB en el nodo
+    (incluyendo mongod shards, mongos y config server)
+    """
+    return sum(p.microwatts for p in get_process_power(endpoint, client))
+
+
+def read_power(endpoint, client=None):
+    """Lectura por proceso sellada con su propio instante monotónico"""
+    t0 = time.monotonic()
+    processes = get_process_power(endpoint, client)
+    t1 = time.monotonic()
+    return Reading(sum(p.microwatts for p in processes), (t0 + t1) / 2,
+                   tuple(processes))
+
+
+def total_power(readings):
+    """Suma en µW de un dict {nodo: Reading}"""
+    return sum(r.microwatts for r in readings.values())
+
+
+def sample_instant(readings):
+    """Instante monotónico representativo de la muestra (media de lecturas)"""
+    stamps = [r.monotonic for r in readings.values()]
+    return sum(stamps) / len(stamps) if stamps else time.monotonic()
+
+
+def reading_skew(readings):
+    """Separación (s) entre la primera y la última lectura de una muestra"""
+    stamps = [r.monotonic for r in readings.values()]
+    return max(stamps) - min(stamps) if stamps else 0.0
+
+
+class PowerReader:
+    """
+    Lanza el scrape de todos los endpoints a la vez (un hilo por nodo), de
+    modo que un nodo lento no desplaza las lecturas de los demás.
+    """
+
+    def __init__(self, endpoints=ENDPOINTS):
+        self.endpoints = endpoints
+        self.client = ScrapeClient(endpoints)
+        self._executor = ThreadPoolExecutor(max_workers=len(endpoints),
+                                            thread_name_prefix="scrape")
+
+    def read(self):
+        """Devuelve {nodo: Reading} con todas las lecturas en paralelo"""
+        futures = {name: self._executor.submit(read_power, url, self.client)
+                   for name, url in self.endpoints.items()}
+        return {name: f.result() for name, f in futures.items()}
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.client.close()
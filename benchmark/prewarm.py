@@ -0,0 +1,110 @@
+"""
+Precalentamiento de caché para las ejecuciones en caliente (sin_diseño/)
+
+Sin esto la iteración 1 paga la carga de páginas y el resto no, y la media
+sale sesgada. Dos etapas, combinables:
+  - touch: recorre cada colección que usa la query (la principal y las de
+    sus $lookup) y cada uno de sus índices, para traerlos a la caché
+  - iterations: ejecuta la query sin muestrear hasta que su latencia se
+    estabiliza; esas iteraciones no se registran (sólo con --prewarm
+    iterations: puede costar hasta PREWARM_MAX_ITERATIONS ejecuciones)
+
+Por defecto sólo touch (config.PREWARM), y sólo antes de la primera iteración
+de una serie: al reanudar desde un checkpoint no se vuelve a precalentar.
+"""
+import statistics
+import time
+
+from .config import (
+    PREWARM_MAX_ITERATIONS, PREWARM_TOLERANCE, PREWARM_WINDOW
+)
+
+STAGES = ("touch", "iterations")
+
+
+def referenced_collections(query):
+    """
+    Colección principal + Query.collections + las de
+    $lookup/$graphLookup/$unionWith (anidadas incluidas)
+    """
+    found = [query.collection]
+    for name in query.collections:
+        if name not in found:
+            found.append(name)
+
+    def walk(node):
+        if isinstance(node, list):
+            for item in node:
+                walk(item)
+        elif isinstance(node, dict):
+            for key, value in node.items():
+                if key in ("$lookup", "$graphLookup") and isinstance(value, dict):
+                    name = value.get("from")
+                elif key == "$unionWith":
+                    name = value.get("coll") if isinstance(value, dict) else value
+                else:
+                    name = None
+                if name and name not in found:
+                    found.append(name)
+                walk(value)
+
+    walk(query.pipeline or [])
+    return found
+
+
+def touch_collection(db, name):
+    """Recorre documentos e índices de `name` sin devolver nada al cliente"""
+    start = time.monotonic()
+    coll = db[name]
+    # Un $match imposible obliga a leer cada documento (COLLSCAN)
+    list(coll.aggregate([{"$match": {"_prewarm_": {"$exists": True}}}],
+                        hint={"$natural": 1}, allowDiskUse=True))
+    indexes = [ix for ix in coll.list_indexes() if ix["name"] != "_id_"]
+    for ix in indexes:
+        fields = {field: 1 for field in ix["key"] if not field.startswith("$")}
+        fields["_id"] = 0
+        list(coll.aggregate([{"$project": fields}, {"$count": "n"}],
+                            hint=ix["name"], allowDiskUse=True))
+    print(f"  🔥 {name}: colección + {len(indexes)} índices en "
+          f"{time.monotonic() - start:.1f}s")
+
+
+def is_stable(durations, window=PREWARM_WINDOW, tolerance=PREWARM_TOLERANCE):
+    """Las últimas `window` duraciones están a menos de `tolerance` de su mediana"""
+    if len(durations) < window:
+        return False
+    recent = durations[-window:]
+    median = statistics.median(recent)
+    return median > 0 and (max(recent) - min(recent)) / median <= tolerance
+
+
+def warmup_iterations(runner, query, max_iterations=PREWARM_MAX_ITERATIONS):
+    """Iteraciones descartadas hasta que la latencia se estabiliza"""
+    durations = []
+    db = runner.client[query.database]
+    for n in range(1, max_iterations + 1):
+        start = time.monotonic()
+        timed_out = runner._execute(query, db)
+        durations.append(time.monotonic() - start)
+        print(f"  🔥 Calentamiento {n}: {durations[-1]:.3f}s")
+        if timed_out:
+            print("  ⚠️  Timeout durante el calentamiento: se continúa sin estabilizar")
+            return durations
+        if is_stable(durations):
+            print(f"  ✅ Latencia estable tras {n} iteraciones de calentamiento")
+            return durations
+    print(f"  ⚠️  Latencia no estabilizada tras {max_iterations} iteraciones")
+    return durations
+
+
+def prewarm(runner, query, stages):
+    """Ejecuta las etapas `stages` (subconjunto de STAGES) para `query`"""
+    if not stages:
+        return
+    print(f"🔥 Precalentando caché ({', '.join(stages)})...")
+    if "touch" in stages:
+        db = runner.client[query.database]
+        for name in referenced_collections(query):
+            touch_collection(db, name)
+    if "iterations" in stages:
+        warmup_iterations(runner, query)
@@ -0,0 +1,103 @@
+"""
+Parser incremental del formato de exposición de Prometheus (texto)
+
+Pensado para los payloads de Scaphandre, que listan todos los procesos del
+host: las familias que no interesan se descartan mirando sólo el nombre, y
+la lectura se corta en cuanto se han leído completas todas las pedidas.
+"""
+from collections import namedtuple
+
+Sample = namedtuple("Sample", ["name", "labels", "value"])
+
+_ESCAPES = {"\\": "\\", '"': '"', "n": "\n"}
+
+
+def parse_labels(text):
+    """'a="x",b="y\\"z"' -> {"a": "x", "b": 'y"z'}"""
+    labels = {}
+    i, n = 0, len(text)
+    while i < n:
+        while i < n and text[i] in " ,":
+            i += 1
+        if i >= n:
+            break
+        eq = text.index("=", i)
+        key = text[i:eq].strip()
+        i = text.index('"', eq) + 1
+        chars = []
+        while text[i] != '"':
+            if text[i] == "\\" and i + 1 < n:
+                chars.append(_ESCAPES.get(text[i + 1], "\\" + text[i + 1]))
+                i += 2
+            else:
+                chars.append(text[i])
+                i += 1
+        labels[key] = "".join(chars)
+        i += 1
+    return labels
+
+
+def _metric_name(line):
+    end = len(line)
+    for sep in ("{", " "):
+        pos = line.find(sep)
+        if pos != -1 and pos < end:
+            end = pos
+    return line[:end]
+
+
+def parse_line(line):
+    """Una línea de muestra -> Sample; None para comentarios/vacías/erróneas"""
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    name = _metric_name(line)
+    rest = line[len(name):]
+    labels = {}
+    if rest.startswith("{"):
+        close = rest.rfind("}")
+        if close == -1:
+            return None
+        try:
+            labels = parse_labels(rest[1:close])
+        except (ValueError, IndexError):
+            # Etiquetas mal formadas ('{pid}', comillas sin cerrar): sólo se
+            # descarta esta línea, no el resto del payload
+            return None
+        rest = rest[close + 1:]
+    parts = rest.split()
+    if not parts:
+        return None
+    try:
+        value = float(parts[0])
+    except ValueError:
+        return None
+    return Sample(name, labels, value)
+
+
+def iter_samples(lines, families=None):
+    """
+    Recorre `lines` (iterable de str, p.ej. resp.iter_lines()) y genera las
+    Sample de las familias pedidas. Con `families`, deja de consumir líneas
+    cuando todas se han visto completas (la exposición las agrupa).
+    """
+    wanted = set(families) if families else None
+    pending = set(wanted) if wanted else None
+    current = None
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", "replace")
+        if not line or line.startswith("#"):
+            continue
+        name = _metric_name(line)
+        if name != current:
+            if pending is not None and current in wanted:
+                pending.discard(current)
+                if not pending:
+                    return
+            current = name
+        if wanted is not None and name not in wanted:
+            continue
+        sample = parse_line(line)
+        if sample is not None:
+            yield sample
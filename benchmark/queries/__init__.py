@@ -0,0 +1,24 @@
+"""
+Registro de queries por esquema
+"""
+from . import indices, sin_diseno
+
+# esquema -> (carpeta de resultados en el repo, queries)
+SCHEMAS = {
+    "sin_diseno": ("sin_diseño", sin_diseno.QUERIES),
+    "indices": ("indices", indices.QUERIES),
+}
+
+# esquema -> base de datos
+DATABASES = {"sin_diseno": sin_diseno.DATABASE, "indices": indices.DATABASE}
+
+
+def get_queries(schema, names=None):
+    """Devuelve las queries del esquema en orden (todas si `names` es None)"""
+    _, queries = SCHEMAS[schema]
+    if not names:
+        return list(queries.values())
+    missing = [n for n in names if n not in queries]
+    if missing:
+        raise KeyError(f"Queries desconocidas en {schema}: {', '.join(missing)}")
+    return [queries[n] for n in names]
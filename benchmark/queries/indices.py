@@ -0,0 +1,707 @@
+"""
+Queries TPC-H sobre el esquema normalizado (tpch_sin_diseno): carpeta indices/
+
+Modo caché frío: Q1-Q5 limpian la caché del SO después de cada iteración;
+Q6, Q8 y Q10 además reinician MongoDB antes de cada iteración y toman una
+muestra final al terminar la query.
+"""
+from datetime import datetime
+
+from ..cache import clear_ram_and_restart_mongodb, clear_ram_remote
+from ..config import COLD_CACHE_MAX_BYTES, QUERY_TIMEOUT
+from ..query import Query
+
+DATABASE = "tpch_sin_diseno"
+
+
+def drop_os_cache(runner):
+    clear_ram_remote()
+
+
+def restart_cold(runner):
+    print("🧊 Limpiando cachés para ejecución en frío...")
+    clear_ram_and_restart_mongodb(DATABASE)
+    # Reconectar cliente después del reinicio
+    runner.reconnect()
+
+
+# Q1: Pricing Summary Report
+Q1_PIPELINE = [
+    {
+        "$match": {
+            "l_shipdate": {
+                "$lte": datetime(1998, 9, 2)
+            }
+        }
+    },
+    {
+        "$group": {
+            "_id": {
+                "l_returnflag": "$l_returnflag",
+                "l_linestatus": "$l_linestatus"
+            },
+            "sum_qty": { "$sum": "$l_quantity" },
+            "sum_base_price": { "$sum": "$l_extendedprice" },
+            "sum_disc_price": {
+                "$sum": {
+                    "$multiply": [
+                        "$l_extendedprice",
+                        { "$subtract": [1, "$l_discount"] }
+                    ]
+                }
+            },
+            "sum_charge": {
+                "$sum": {
+                    "$multiply": [
+                        "$l_extendedprice",
+                        { "$subtract": [1, "$l_discount"] },
+                        { "$add": [1, "$l_tax"] }
+                    ]
+                }
+            },
+            "avg_qty": { "$avg": "$l_quantity" },
+            "avg_price": { "$avg": "$l_extendedprice" },
+            "avg_disc": { "$avg": "$l_discount" },
+            "count_order": { "$sum": 1 }
+        }
+    },
+    {
+        "$project": {
+            "_id": 0,
+            "l_returnflag": "$_id.l_returnflag",
+            "l_linestatus": "$_id.l_linestatus",
+            "sum_qty": 1,
+            "sum_base_price": 1,
+            "sum_disc_price": 1,
+            "sum_charge": 1,
+            "avg_qty": 1,
+            "avg_price": 1,
+            "avg_disc": 1,
+            "count_order": 1
+        }
+    },
+    {
+        "$sort": {
+            "l_returnflag": 1,
+            "l_linestatus": 1
+        }
+    }
+]
+
+
+# Q2: Minimum Cost Supplier Query
+Q2_P_SIZE = 15
+Q2_P_TYPE_SUFFIX = "BRASS"
+Q2_R_NAME = "EUROPE"
+
+Q2_PIPELINE = [
+    {
+        "$match": {
+            "p_size": Q2_P_SIZE,
+            "p_type": { "$regex": f"{Q2_P_TYPE_SUFFIX}$" }
+        }
+    },
+    {
+        "$lookup": {
+            "from": "partsupps",
+            "localField": "p_partkey",
+            "foreignField": "ps_partkey",
+            "as": "partsupps"
+        }
+    },
+    { "$unwind": "$partsupps" },
+    {
+        "$lookup": {
+            "from": "suppliers",
+            "localField": "partsupps.ps_suppkey",
+            "foreignField": "s_suppkey",
+            "as": "supplier"
+        }
+    },
+    { "$unwind": "$supplier" },
+    {
+        "$lookup": {
+            "from": "nations",
+            "localField": "supplier.s_nationkey",
+            "foreignField": "n_nationkey",
+            "as": "nation"
+        }
+    },
+    { "$unwind": "$nation" },
+    {
+        "$lookup": {
+            "from": "regions",
+            "localField": "nation.n_regionkey",
+            "foreignField": "r_regionkey",
+            "as": "region"
+        }
+    },
+    { "$unwind": "$region" },
+    {
+        "$match": {
+            "region.r_name": Q2_R_NAME
+        }
+    },
+    {
+        "$group": {
+            "_id": "$p_partkey",
+            "min_supplycost": { "$min": "$partsupps.ps_supplycost" },
+            "docs": { "$push": "$$ROOT" }
+        }
+    },
+    { "$unwind": "$docs" },
+    {
+        "$match": {
+            "$expr": { 
+                "$eq": ["$docs.partsupps.ps_supplycost", "$min_supplycost"] 
+            }
+        }
+    },
+    {
+        "$project": {
+            "_id": 0,
+            "s_acctbal": "$docs.supplier.s_acctbal",
+            "s_name": "$docs.supplier.s_name",
+            "n_name": "$docs.nation.n_name",
+            "p_partkey": "$docs.p_partkey",
+            "p_mfgr": "$docs.p_mfgr",
+            "s_address": "$docs.supplier.s_address",
+            "s_phone": "$docs.supplier.s_phone",
+            "s_comment": "$docs.supplier.s_comment"
+        }
+    },
+    {
+        "$sort": {
+            "s_acctbal": -1,
+            "n_name": 1,
+            "s_name": 1,
+            "p_partkey": 1
+        }
+    },
+    { "$limit": 100 }
+]
+
+
+# Q3: Shipping Priority Query
+Q3_C_MKTSEGMENT = "BUILDING"
+Q3_ORDER_DATE_LIMIT = datetime(1995, 3, 15)
+Q3_SHIP_DATE_LIMIT = datetime(1995, 3, 15)
+
+Q3_PIPELINE = [
+    {
+        "$match": {
+            "c_mktsegment": Q3_C_MKTSEGMENT
+        }
+    },
+    {
+        "$lookup": {
+            "from": "orders",
+            "localField": "c_custkey",
+            "foreignField": "o_custkey",
+            "as": "orders"
+        }
+    },
+    { "$unwind": "$orders" },
+    {
+        "$match": {
+            "orders.o_orderdate": { "$lt": Q3_ORDER_DATE_LIMIT }
+        }
+    },
+    {
+        "$lookup": {
+            "from": "lineitems",
+            "localField": "orders.o_orderkey",
+            "foreignField": "l_orderkey",
+            "as": "lineitems"
+        }
+    },
+    { "$unwind": "$lineitems" },
+    {
+        "$match": {
+            "lineitems.l_shipdate": { "$gt": Q3_SHIP_DATE_LIMIT }
+        }
+    },
+    {
+        "$addFields": {
+            "revenue": {
+                "$multiply": [
+                    "$lineitems.l_extendedprice",
+                    { "$subtract": [1, "$lineitems.l_discount"] }
+                ]
+            }
+        }
+    },
+    {
+        "$group": {
+            "_id": {
+                "l_orderkey": "$orders.o_orderkey",
+                "o_orderdate": "$orders.o_orderdate",
+                "o_shippriority": "$orders.o_shippriority"
+            },
+            "revenue": { "$sum": "$revenue" }
+        }
+    },
+    {
+        "$project": {
+            "_id": 0,
+            "l_orderkey": "$_id.l_orderkey",
+            "revenue": { "$round": ["$revenue", 2] },
+            "o_orderdate": "$_id.o_orderdate",
+            "o_shippriority": "$_id.o_shippriority"
+        }
+    },
+    {
+        "$sort": {
+            "revenue": -1,
+            "o_orderdate": 1
+        }
+    },
+    { "$limit": 10 }
+]
+
+
+# Q4: Order Priority Checking Query
+Q4_START_DATE = datetime(1993, 7, 1)
+Q4_END_DATE = datetime(1993, 10, 1)  # 3 meses después
+
+Q4_PIPELINE = [
+    {
+        "$match": {
+            "o_orderdate": {
+                "$gte": Q4_START_DATE,
+                "$lt": Q4_END_DATE
+            }
+        }
+    },
+    {
+        "$lookup": {
+            "from": "lineitems",
+            "let": { "orderkey": "$o_orderkey" },
+            "pipeline": [
+                {
+                    "$match": {
+                        "$expr": {
+                            "$and": [
+                                { "$eq": ["$l_orderkey", "$$orderkey"] },
+                                { "$lt": ["$l_commitdate", "$l_receiptdate"] }
+                            ]
+                        }
+                    }
+                },
+                { "$limit": 1 }
+            ],
+            "as": "matching_lineitems"
+        }
+    },
+    {
+        "$match": {
+            "matching_lineitems": { "$ne": [] }
+        }
+    },
+    {
+        "$group": {
+            "_id": "$o_orderpriority",
+            "order_count": { "$sum": 1 }
+        }
+    },
+    {
+        "$project": {
+            "_id": 0,
+            "o_orderpriority": "$_id",
+            "order_count": 1
+        }
+    },
+    {
+        "$sort": {
+            "o_orderpriority": 1
+        }
+    }
+]
+
+
+# Q5: Local Supplier Volume Query
+Q5_R_NAME = "ASIA"
+Q5_START_DATE = datetime(1994, 1, 1)
+Q5_END_DATE = datetime(1995, 1, 1)  # 1 año después
+
+Q5_PIPELINE = [
+    {
+        "$lookup": {
+            "from": "nations",
+            "localField": "c_nationkey",
+            "foreignField": "n_nationkey",
+            "as": "nation"
+        }
+    },
+    { "$unwind": "$nation" },
+    {
+        "$lookup": {
+            "from": "regions",
+            "localField": "nation.n_regionkey",
+            "foreignField": "r_regionkey",
+            "as": "region"
+        }
+    },
+    { "$unwind": "$region" },
+    {
+        "$match": {
+            "region.r_name": Q5_R_NAME
+        }
+    },
+    {
+        "$lookup": {
+            "from": "orders",
+            "localField": "c_custkey",
+            "foreignField": "o_custkey",
+            "as": "orders"
+        }
+    },
+    { "$unwind": "$orders" },
+    {
+        "$match": {
+            "orders.o_orderdate": {
+                "$gte": Q5_START_DATE,
+                "$lt": Q5_END_DATE
+            }
+        }
+    },
+    {
+        "$lookup": {
+            "from": "lineitems",
+            "localField": "orders.o_orderkey",
+            "foreignField": "l_orderkey",
+            "as": "lineitems"
+        }
+    },
+    { "$unwind": "$lineitems" },
+    {
+        "$lookup": {
+            "from": "suppliers",
+            "localField": "lineitems.l_suppkey",
+            "foreignField": "s_suppkey",
+            "as": "supplier"
+        }
+    },
+    { "$unwind": "$supplier" },
+    {
+        "$match": {
+            "$expr": {
+                "$eq": ["$c_nationkey", "$supplier.s_nationkey"]
+            }
+        }
+    },
+    {
+        "$addFields": {
+            "revenue_item": {
+                "$multiply": [
+                    "$lineitems.l_extendedprice",
+                    { "$subtract": [1, "$lineitems.l_discount"] }
+                ]
+            }
+        }
+    },
+    {
+        "$group": {
+            "_id": "$nation.n_name",
+            "revenue": { "$sum": "$revenue_item" }
+        }
+    },
+    {
+        "$project": {
+            "_id": 0,
+            "n_name": "$_id",
+            "revenue": { "$round": ["$revenue", 2] }
+        }
+    },
+    {
+        "$sort": {
+            "revenue": -1
+        }
+    }
+]
+
+
+# Q6: Forecasting Revenue Change Query
+Q6_START_DATE = datetime(1994, 1, 1)
+Q6_END_DATE = datetime(1995, 1, 1)
+Q6_DISCOUNT = 0.06
+Q6_QUANTITY_LIMIT = 24
+
+Q6_PIPELINE = [
+    {
+        "$match": {
+            "l_shipdate": {
+                "$gte": Q6_START_DATE,
+                "$lt": Q6_END_DATE
+            },
+            "l_discount": {
+                "$gte": Q6_DISCOUNT - 0.01,
+                "$lte": Q6_DISCOUNT + 0.01
+            },
+            "l_quantity": { "$lt": Q6_QUANTITY_LIMIT }
+        }
+    },
+    {
+        "$group": {
+            "_id": None,
+            "revenue": {
+                "$sum": { "$multiply": ["$l_extendedprice", "$l_discount"] }
+            }
+        }
+    },
+    {
+        "$project": {
+            "_id": 0,
+            "revenue": { "$round": ["$revenue", 2] }
+        }
+    }
+]
+
+
+# Q8: National Market Share Query
+Q8_TARGET_NATION = "BRAZIL"
+Q8_REGION_NAME = "AMERICA"
+Q8_PART_TYPE = "ECONOMY ANODIZED STEEL"
+Q8_START_DATE = datetime(1995, 1, 1)
+Q8_END_DATE = datetime(1996, 12, 31, 23, 59, 59, 999000)
+
+Q8_PIPELINE = [
+    {
+        "$match": {
+            "p_type": Q8_PART_TYPE
+        }
+    },
+    {
+        "$lookup": {
+            "from": "lineitems",
+            "localField": "p_partkey",
+            "foreignField": "l_partkey",
+            "as": "lineitems"
+        }
+    },
+    { "$unwind": "$lineitems" },
+    {
+        "$lookup": {
+            "from": "suppliers",
+            "localField": "lineitems.l_suppkey",
+            "foreignField": "s_suppkey",
+            "as": "supplier"
+        }
+    },
+    { "$unwind": "$supplier" },
+    {
+        "$lookup": {
+            "from": "nations",
+            "localField": "supplier.s_nationkey",
+            "foreignField": "n_nationkey",
+            "as": "supp_nation"
+        }
+    },
+    { "$unwind": "$supp_nation" },
+    {
+        "$lookup": {
+            "from": "orders",
+            "localField": "lineitems.l_orderkey",
+            "foreignField": "o_orderkey",
+            "as": "order"
+        }
+    },
+    { "$unwind": "$order" },
+    {
+        "$match": {
+            "order.o_orderdate": {
+                "$gte": Q8_START_DATE,
+                "$lte": Q8_END_DATE
+            }
+        }
+    },
+    {
+        "$lookup": {
+            "from": "customers",
+            "localField": "order.o_custkey",
+            "foreignField": "c_custkey",
+            "as": "customer"
+        }
+    },
+    { "$unwind": "$customer" },
+    {
+        "$lookup": {
+            "from": "nations",
+            "localField": "customer.c_nationkey",
+            "foreignField": "n_nationkey",
+            "as": "cust_nation"
+        }
+    },
+    { "$unwind": "$cust_nation" },
+    {
+        "$lookup": {
+            "from": "regions",
+            "localField": "cust_nation.n_regionkey",
+            "foreignField": "r_regionkey",
+            "as": "region"
+        }
+    },
+    { "$unwind": "$region" },
+    {
+        "$match": {
+            "region.r_name": Q8_REGION_NAME
+        }
+    },
+    {
+        "$addFields": {
+            "o_year": { "$year": "$order.o_orderdate" },
+            "volume": {
+                "$multiply": [
+                    "$lineitems.l_extendedprice",
+                    { "$subtract": [1, "$lineitems.l_discount"] }
+                ]
+            },
+            "nation": "$supp_nation.n_name"
+        }
+    },
+    {
+        "$group": {
+            "_id": "$o_year",
+            "total_volume": { "$sum": "$volume" },
+            "target_volume": {
+                "$sum": {
+                    "$cond": [
+                        { "$eq": ["$nation", Q8_TARGET_NATION] },
+                        "$volume",
+                        0
+                    ]
+                }
+            }
+        }
+    },
+    {
+        "$project": {
+            "_id": 0,
+            "o_year": "$_id",
+            "mkt_share": {
+                "$cond": [
+                    { "$eq": ["$total_volume", 0] },
+                    0,
+                    { "$divide": ["$target_volume", "$total_volume"] }
+                ]
+            }
+        }
+    },
+    {
+        "$sort": {
+            "o_year": 1
+        }
+    }
+]
+
+
+# Q10: Returned Item Reporting Query
+Q10_START_DATE = datetime(1993, 10, 1)
+Q10_END_DATE = datetime(1994, 1, 1)  # 3 meses después
+
+Q10_PIPELINE = [
+    {
+        "$lookup": {
+            "from": "orders",
+            "localField": "c_custkey",
+            "foreignField": "o_custkey",
+            "as": "orders"
+        }
+    },
+    { "$unwind": "$orders" },
+    {
+        "$match": {
+            "orders.o_orderdate": {
+                "$gte": Q10_START_DATE,
+                "$lt": Q10_END_DATE
+            }
+        }
+    },
+    {
+        "$lookup": {
+            "from": "lineitems",
+            "localField": "orders.o_orderkey",
+            "foreignField": "l_orderkey",
+            "as": "lineitems"
+        }
+    },
+    { "$unwind": "$lineitems" },
+    {
+        "$match": {
+            "lineitems.l_returnflag": "R"
+        }
+    },
+    {
+        "$lookup": {
+            "from": "nations",
+            "localField": "c_nationkey",
+            "foreignField": "n_nationkey",
+            "as": "nation"
+        }
+    },
+    { "$unwind": "$nation" },
+    {
+        "$addFields": {
+            "revenue_item": {
+                "$multiply": [
+                    "$lineitems.l_extendedprice",
+                    { "$subtract": [1, "$lineitems.l_discount"] }
+                ]
+            }
+        }
+    },
+    {
+        "$group": {
+            "_id": "$c_custkey",
+            "c_name": { "$first": "$c_name" },
+            "c_acctbal": { "$first": "$c_acctbal" },
+            "c_phone": { "$first": "$c_phone" },
+            "c_address": { "$first": "$c_address" },
+            "c_comment": { "$first": "$c_comment" },
+            "n_name": { "$first": "$nation.n_name" },
+            "revenue": { "$sum": "$revenue_item" }
+        }
+    },
+    {
+        "$project": {
+            "_id": 0,
+            "c_custkey": "$_id",
+            "c_name": 1,
+            "revenue": 1,
+            "c_acctbal": 1,
+            "n_name": 1,
+            "c_address": 1,
+            "c_phone": 1,
+            "c_comment": 1
+        }
+    },
+    {
+        "$sort": {
+            "revenue": -1
+        }
+    },
+    { "$limit": 20 }
+]
+
+
+QUERIES = {q.name: q for q in [
+    Query("Q1", "Q1_Pricing_Summary", "Pricing Summary Report", DATABASE, "lineitems",
+          pipeline=Q1_PIPELINE, teardown=drop_os_cache, timeout=QUERY_TIMEOUT),
+    Query("Q2", "Q2_Minimum_Cost_Supplier", "Minimum Cost Supplier Query", DATABASE, "parts",
+          pipeline=Q2_PIPELINE, teardown=drop_os_cache, timeout=QUERY_TIMEOUT),
+    Query("Q3", "Q3_Shipping_Priority", "Shipping Priority Query", DATABASE, "customers",
+          pipeline=Q3_PIPELINE, teardown=drop_os_cache, timeout=QUERY_TIMEOUT),
+    Query("Q4", "Q4_Order_Priority_Checking", "Order Priority Checking Query", DATABASE, "orders",
+          pipeline=Q4_PIPELINE, teardown=drop_os_cache, timeout=QUERY_TIMEOUT),
+    Query("Q5", "Q5_Local_Supplier_Volume", "Local Supplier Volume Query", DATABASE, "customers",
+          pipeline=Q5_PIPELINE, teardown=drop_os_cache, timeout=QUERY_TIMEOUT),
+    Query("Q6", "Q6_Forecasting_Revenue_Change", "Forecasting Revenue Change Query", DATABASE, "lineitems",
+          pipeline=Q6_PIPELINE, setup=restart_cold, final_sample=True,
+          timeout=QUERY_TIMEOUT, pause=5, max_cache_bytes=COLD_CACHE_MAX_BYTES),
+    Query("Q8", "Q8_National_Market_Share", "National Market Share Query", DATABASE, "parts",
+          pipeline=Q8_PIPELINE, setup=restart_cold, final_sample=True,
+          timeout=QUERY_TIMEOUT, pause=5, max_cache_bytes=COLD_CACHE_MAX_BYTES),
+    Query("Q10", "Q10_Returned_Item_Reporting", "Returned Item Reporting Query", DATABASE, "customers",
+          pipeline=Q10_PIPELINE, setup=restart_cold, final_sample=True,
+          timeout=QUERY_TIMEOUT, pause=5, max_cache_bytes=COLD_CACHE_MAX_BYTES),
+]}
@@ -0,0 +1,49 @@
+"""
+Definición declarativa de una query del benchmark
+"""
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+@dataclass
+class Query:
+    """
+    name: "Q6"; label: valor de la columna "query" en el CSV.
+    `run(db)` sustituye al pipeline en queries de varios pasos (Q17);
+    `collections` declara las demás colecciones que lee, para precalentarlas.
+    `setup(runner)` / `teardown(runner)` se ejecutan antes/después de cada
+    iteración (limpieza de cachés, reinicios, ...).
+    `max_cache_bytes`: caché WiredTiger máxima por mongod para empezar una
+    iteración (None: sólo se registra).
+    `warm`: precalentar la caché antes de la primera iteración registrada.
+    `indexes`: {colección: [(nombre, clave)]} que la query necesita; el
+    runner los crea y verifica sea cual sea el perfil de índices.
+    """
+    name: str
+    label: str
+    title: str
+    database: str
+    collection: str
+    pipeline: Optional[list] = None
+    run: Optional[Callable] = None
+    collections: tuple = ()
+    setup: Optional[Callable] = None
+    teardown: Optional[Callable] = None
+    final_sample: bool = False
+    timeout: Optional[int] = None
+    pause: int = 3
+    max_cache_bytes: Optional[int] = None
+    warm: bool = False
+    indexes: Optional[dict] = None
+
+    @property
+    def output_name(self):
+        """Nombre base de los ficheros de resultados (sin extensión)"""
+        return f"{self.name.lower()}_energy_metrics"
+
+    def execute(self, db):
+        """Ejecuta la query completa y materializa el resultado"""
+        if self.run is not None:
+            return self.run(db)
+        cursor = db[self.collection].aggregate(self.pipeline, allowDiskUse=True)
+        return list(cursor)
@@ -0,0 +1,130 @@
+"""
+Disponibilidad del cluster tras reiniciar MongoDB
+
+En lugar de dormir un tiempo fijo se sondea directamente cada mongod (shards
+y config server) y después mongos, con backoff exponencial, hasta que:
+  - cada mongod es primario de su replica set y ningún miembro está
+    arrancando o recuperándose (hello + replSetGetStatus)
+  - mongos ve todos los shards, ha refrescado su tabla de rutas y llega a
+    todos ellos (listShards + flushRouterConfig + listDatabases/dbStats)
+  - el pool de conexiones de mongos tiene conexiones a cada shard
+    (connPoolStats)
+"""
+import time
+
+from pymongo import MongoClient
+from pymongo.errors import OperationFailure, PyMongoError
+
+from .config import (
+    CLUSTER_MEMBERS, MONGOS_URI, READY_BACKOFF_MAX, READY_POLL, READY_TIMEOUT
+)
+
+# Estados transitorios de un miembro de replica set
+RECOVERING_STATES = {"STARTUP", "STARTUP2", "RECOVERING", "ROLLBACK"}
+
+_COMMAND_NOT_FOUND = 59
+_NO_REPLICATION_ENABLED = 76
+
+
+class NotReady(Exception):
+    pass
+
+
+def _client(host, timeout, direct=True):
+    ms = max(int(timeout * 1000), 200)
+    options = {"directConnection": True} if direct else {}
+    return MongoClient(host, serverSelectionTimeoutMS=ms, connectTimeoutMS=ms, **options)
+
+
+def _hello(client):
+    try:
+        return client.admin.command("hello")
+    except OperationFailure as e:
+        if e.code != _COMMAND_NOT_FOUND:
+            raise
+        return client.admin.command("isMaster")  # MongoDB < 4.4.2
+
+
+def check_member(client):
+    """Lanza NotReady si el mongod no es primario o su replica set se está recuperando"""
+    hello = _hello(client)
+    if not (hello.get("isWritablePrimary") or hello.get("ismaster")):
+        raise NotReady("todavía no es primario")
+    try:
+        status = client.admin.command("replSetGetStatus")
+    except OperationFailure as e:
+        if e.code == _NO_REPLICATION_ENABLED:
+            return  # standalone: con hello basta
+        raise
+    if status.get("myState") != 1:
+        raise NotReady(f"myState={status.get('myState')}")
+    busy = [f"{m['name']} {m['stateStr']}" for m in status.get("members", [])
+            if m.get("stateStr") in RECOVERING_STATES]
+    if busy:
+        raise NotReady(", ".join(busy))
+
+
+def _shard_hosts(shard):
+    """'rs1/a:27018,b:27018' -> ['a:27018', 'b:27018']"""
+    return shard["host"].split("/", 1)[-1].split(",")
+
+
+def check_router(client, database=None):
+    """Lanza NotReady si mongos no enruta todavía a todos los shards"""
+    shards = client.admin.command("listShards")["shards"]
+    if not shards:
+        raise NotReady("mongos no ve ningún shard")
+    # Fuerza a mongos a recargar las rutas del config server en el próximo acceso
+    client.admin.command("flushRouterConfig")
+    client.admin.command("listDatabases", nameOnly=True)
+    if database:
+        client[database].command("dbStats")  # se reparte a todos los shards
+    pool = client.admin.command("connPoolStats").get("hosts", {})
+    missing = [s["_id"] for s in shards
+               if not any(host in pool for host in _shard_hosts(s))]
+    if missing:
+        raise NotReady(f"sin conexiones en el pool a {', '.join(missing)}")
+
+
+def _reason(error):
+    text = str(error).splitlines()[0] if str(error) else type(error).__name__
+    return text if len(text) <= 100 else text[:97] + "..."
+
+
+def wait_until_ready(uri=MONGOS_URI, members=CLUSTER_MEMBERS, database=None,
+                     timeout=READY_TIMEOUT, poll=READY_POLL, max_delay=READY_BACKOFF_MAX):
+    """
+    Bloquea hasta que todos los mongod de `members` y mongos están listos;
+    devuelve los segundos esperados. Lanza NotReady si vence `timeout`.
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    delay = poll
+    clients = {name: _client(host, poll) for name, host in members.items()}
+    # mongos el último: sólo tiene sentido cuando los shards ya responden
+    clients["mongos"] = _client(uri, poll, direct=False)
+    ready = set()
+    try:
+        while True:
+            name = None
+            try:
+                for name, client in clients.items():
+                    if name in ready:
+                        continue
+                    if name == "mongos":
+                        check_router(client, database)
+                    else:
+                        check_member(client)
+                    ready.add(name)
+                    print(f"  ✅ {name} listo ({time.monotonic() - start:.1f}s)")
+                return time.monotonic() - start
+            except (NotReady, PyMongoError) as e:
+                if time.monotonic() + delay > deadline:
+                    print(f"  ⚠️  {name} no está listo después de {timeout}s: {_reason(e)}")
+                    raise NotReady(f"{name}: {_reason(e)}") from e
+                print(f"  ⏳ {name}: {_reason(e)} (reintento en {delay:.2f}s)")
+                time.sleep(delay)
+                delay = min(delay * 2, max_delay)
+    finally:
+        for client in clients.values():
+            client.close()
@@ -0,0 +1,319 @@
+"""
+Motor de ejecución: un proceso, un MongoClient y un sampler para
+todas las queries e iteraciones.
+"""
+import json
+import os
+import signal
+import time
+import traceback
+from dataclasses import replace
+
+from pymongo import MongoClient
+
+from .breakdown import ProcessPowerTable
+from .cache import (CacheNotCold, dump_cache_csv, print_residency, probe_wiredtiger_cache,
+                    wait_until_cold)
+from .checkpoint import Checkpoint
+from .config import (INDEX_PROFILES, ITERATIONS, LOOKUP_STRATEGY, MONGOS_URI, OUTPUT_FORMATS,
+                     PREWARM)
+from .indexes import (SCHEMAS_BY_DATABASE, describe, drop_specs, ensure, existing_indexes,
+                      profile_for, provision, read_metadata, write_metadata)
+from .lookups import apply
+from .power import total_power
+from .prewarm import prewarm
+from .sampler import Sampler
+from .writer import EXTENSIONS, BufferedWriter, prune_segments
+
+
+class TimeoutException(Exception):
+    pass
+
+
+def timeout_handler(signum, frame):
+    raise TimeoutException("Query excedió el tiempo límite")
+
+
+def companion_csv_path(stem, name):
+    """(.../q6_energy_metrics, "process_power") -> .../q6_process_power.csv"""
+    if stem.endswith("_energy_metrics"):
+        stem = stem[:-len("_energy_metrics")]
+    return f"{stem}_{name}.csv"
+
+
+def checkpoint_path(stem):
+    return stem + ".checkpoint.json"
+
+
+def metadata_path(stem):
+    return stem + ".metadata.json"
+
+
+def comparable_indexes(indexes):
+    """Índices de los metadatos como en el JSON (listas) y sin depender del orden"""
+    indexes = json.loads(json.dumps(indexes))
+    return {collection: sorted(items, key=lambda ix: ix["name"])
+            for collection, items in indexes.items()}
+
+
+class Runner:
+
+    def __init__(self, uri=MONGOS_URI, sampler=None, formats=OUTPUT_FORMATS,
+                 prewarm_stages=PREWARM, index_profiles=INDEX_PROFILES,
+                 lookup_strategy=LOOKUP_STRATEGY):
+        self.uri = uri
+        self.formats = formats
+        self.prewarm_stages = prewarm_stages
+        self.index_profiles = index_profiles
+        self.index_config = {}
+        self.lookup_strategy = lookup_strategy
+        self.client = MongoClient(uri, serverSelectionTimeoutMS=5000)
+        self.sampler = sampler or Sampler()
+
+    def reconnect(self):
+        """Nuevo pool de conexiones (necesario tras reiniciar mongod)"""
+        self.client.close()
+        self.client = MongoClient(self.uri, serverSelectionTimeoutMS=5000)
+
+    def ping(self):
+        try:
+            self.client.admin.command("ping")
+            print("✅ Conectado a MongoDB\n")
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            raise
+
+    def close(self):
+        self.sampler.close()
+        self.client.close()
+
+    def prepare_indexes(self, database):
+        """
+        Aplica una sola vez por base de datos su perfil de índices; devuelve
+        los metadatos con los índices que hay ahora (otra query puede haberlos
+        cambiado desde entonces)
+        """
+        if database not in self.index_config:
+            profile = self.index_profiles.get(SCHEMAS_BY_DATABASE.get(database))
+            if profile is not None:
+                provision(self.client, database, profile)
+            self.index_config[database] = profile
+        return describe(database, self.index_config[database],
+                        existing_indexes(self.client[database]))
+
+    def plan(self, query):
+        """La query con sus $lookup según la estrategia del runner (ver lookups.py)"""
+        if query.pipeline is None:
+            return query
+        return replace(query, pipeline=apply(query.pipeline, self.lookup_strategy))
+
+    def _residency(self, query):
+        """
+        Medida de la caché WiredTiger antes de una iteración; con
+        max_cache_bytes espera a que se enfríe y, si no lo hace, repite el
+        setup una vez. CacheNotCold si sigue caliente.
+        """
+        if query.max_cache_bytes is None:
+            residency = probe_wiredtiger_cache()
+        else:
+            try:
+                residency = wait_until_cold(query.max_cache_bytes)
+            except CacheNotCold:
+                if query.setup is None:
+                    raise
+                print("  🔁 Repitiendo el setup para enfriar la caché...")
+                query.setup(self)
+                residency = wait_until_cold(query.max_cache_bytes)
+        print_residency(residency)
+        return residency
+
+    def _execute(self, query, db):
+        """Ejecuta la query con timeout opcional; devuelve True si expiró"""
+        if query.timeout:
+            signal.signal(signal.SIGALRM, timeout_handler)
+            signal.alarm(query.timeout)
+        try:
+            result = query.execute(db)
+            print(f"   ✅ Filas resultantes: {len(result)}")
+        except TimeoutException:
+            print(f"⏰ TIMEOUT: Query excedió {query.timeout/3600:.1f} horas")
+            return True
+        except Exception as e:
+            print(f"❌ Error en query: {e}")
+            traceback.print_exc()
+        finally:
+            if query.timeout:
+                signal.alarm(0)
+        return False
+
+    def owned_indexes(self, query):
+        """
+        Índices de Query.indexes que no son del perfil activo (o, sin perfil,
+        que aún no existen): sólo valen para la serie de la query
+        """
+        profile = self.index_profiles.get(SCHEMAS_BY_DATABASE.get(query.database))
+        if profile is None:
+            current = existing_indexes(self.client[query.database])
+            kept = {collection: set(names) for collection, names in current.items()}
+        else:
+            kept = {collection: {name for name, _ in specs}
+                    for collection, specs in profile_for(query.database, profile).items()}
+        owned = {collection: [(name, key) for name, key in specs
+                              if name not in kept.get(collection, set())]
+                 for collection, specs in (query.indexes or {}).items()}
+        return {collection: specs for collection, specs in owned.items() if specs}
+
+    def run_query(self, query, output_stem, iterations=ITERATIONS, start_iteration=1,
+                  resume=True):
+        """
+        Ejecuta `iterations` iteraciones de una query; `output_stem` es la ruta
+        de resultados sin extensión (se añade una por formato). Con `resume`,
+        las iteraciones del checkpoint de una ejecución anterior se saltan y
+        los resultados se continúan en los mismos ficheros.
+        """
+        print("=" * 70)
+        print(f"🧪 {query.name} TPC-H: {query.title}")
+        print(f"📊 Iteraciones: {start_iteration} → {iterations}")
+        print(f"⏱️  Sampling: cada {self.sampler.interval} segundos")
+        print("=" * 70)
+
+        query = self.plan(query)
+        metadata = dict(self.prepare_indexes(query.database), query=query.label,
+                        lookups=self.lookup_strategy, query_indexes=[])
+        owned = self.owned_indexes(query)
+        try:
+            if query.indexes:
+                current = ensure(self.client, query.database, query.indexes, query.name)
+                metadata.update(indexes=describe(query.database, None, current)["indexes"],
+                                query_indexes=[f"{collection}.{name}"
+                                               for collection, specs in query.indexes.items()
+                                               for name, _ in specs])
+            self._run_series(query, output_stem, iterations, start_iteration, resume, metadata)
+        finally:
+            # Las queries siguientes (y otras series) no deben ver estos índices
+            if owned:
+                drop_specs(self.client, query.database, owned)
+
+    def _run_series(self, query, output_stem, iterations, start_iteration, resume, metadata):
+        previous = read_metadata(metadata_path(output_stem))
+        if resume and previous:
+            # Una serie no mezcla configuraciones de índices ni de $lookup
+            for key in ("index_profile", "lookups", "query_indexes"):
+                if previous.get(key, metadata[key]) != metadata[key]:
+                    print(f"⚠️  {key}: {previous.get(key)} → {metadata[key]}, se empieza de cero")
+                    resume = False
+            if "indexes" in previous and \
+                    comparable_indexes(previous["indexes"]) != comparable_indexes(metadata["indexes"]):
+                print("⚠️  Los índices reales no son los de la serie anterior, se empieza de cero")
+                resume = False
+
+        process_path = companion_csv_path(output_stem, "process_power")
+        cache_path = companion_csv_path(output_stem, "wiredtiger_cache")
+        checkpoint = Checkpoint.load(checkpoint_path(output_stem), query.label)
+        if not resume:
+            checkpoint.reset()
+        resuming = bool(checkpoint.completed)
+        if resuming:
+            # Descarta lo escrito después del último checkpoint
+            checkpoint.restore_files()
+            print(f"♻️  Reanudando: {len(checkpoint.completed)} iteraciones ya completadas")
+        else:
+            for path in (process_path, cache_path):
+                open(path, "w").close()
+        for fmt in self.formats:
+            if fmt != "csv":
+                prune_segments(output_stem + EXTENSIONS[fmt], checkpoint.completed)
+
+        pending = [i for i in range(start_iteration, iterations + 1)
+                   if not checkpoint.is_done(i)]
+        if not pending:
+            print(f"✅ {query.name} ya estaba completa: nada que ejecutar")
+            return
+        write_metadata(metadata_path(output_stem), metadata)
+
+        if query.warm and not resuming:
+            prewarm(self, query, self.prewarm_stages)
+
+        processes = ProcessPowerTable(self.sampler.endpoints)
+        writer = BufferedWriter(output_stem, self.formats, processes, append=resuming)
+        skipped = []
+        try:
+            for iteration in pending:
+                print(f"\n{'='*70}")
+                print(f"🔄 Iteración {iteration}/{iterations}")
+                print(f"{'='*70}")
+
+                if query.setup is not None:
+                    query.setup(self)
+
+                try:
+                    residency = self._residency(query)
+                except CacheNotCold as e:
+                    # Sin checkpoint: la iteración queda pendiente para reanudar
+                    print(f"⚠️  Iteración {iteration} omitida, la caché no está en frío: {e}")
+                    skipped.append(iteration)
+                    continue
+                db = self.client[query.database]
+
+                start_time = time.monotonic()
+                self.sampler.start(writer, query.label, iteration, start_time)
+
+                print(f"⏱️  Ejecutando {query.name}...")
+                timed_out = self._execute(query, db)
+                duration = time.monotonic() - start_time
+
+                if query.final_sample:
+                    # Detener sampling inmediatamente y tomar muestra final
+                    self.sampler.stop()
+                    print("  📊 Tomando muestra final...")
+                    readings = self.sampler.read()
+                    writer.write_sample(query.label, iteration, duration, readings)
+                    print(f"  ✅ Muestra final: {total_power(readings)/1000:.2f} mW")
+                else:
+                    # Esperar último sample
+                    time.sleep(self.sampler.interval)
+                    self.sampler.stop()
+
+                def close_iteration(iteration=iteration, residency=residency):
+                    processes.print_summary()
+                    processes.dump_csv(process_path, query.label, iteration)
+                    processes.clear()
+                    dump_cache_csv(cache_path, query.label, iteration, residency)
+                    checkpoint.record(iteration, writer.paths + [process_path, cache_path])
+
+                # Todo lo encolado queda escrito y con fsync antes de seguir
+                writer.end_iteration(close_iteration)
+
+                if timed_out:
+                    print(f"⚠️  Iteración {iteration} cancelada por timeout ({duration/3600:.2f}h)")
+                else:
+                    print(f"✅ Completada en {duration:.3f}s ({duration/60:.2f} min)")
+
+                if query.teardown is not None:
+                    query.teardown(self)
+
+                if iteration != pending[-1]:
+                    print(f"\n⏳ Esperando {query.pause} segundos...")
+                    time.sleep(query.pause)
+        finally:
+            self.sampler.stop()
+            writer.close()
+
+        self.sampler.reader.client.report()
+        if skipped:
+            print(f"⚠️  Iteraciones omitidas por caché caliente (se repiten al reanudar): "
+                  f"{', '.join(map(str, skipped))}")
+        print()
+        for path in writer.paths:
+            print(f"📄 Archivo: {path}")
+        print(f"📄 Desglose por proceso: {process_path}")
+        print(f"📄 Caché WiredTiger: {cache_path}")
+        print(f"📄 Índices y $lookup: {metadata_path(output_stem)}")
+
+    def run_suite(self, queries, output_dir, iterations=ITERATIONS, resume=True):
+        """Ejecuta varias queries seguidas reutilizando cliente y sampler"""
+        for query in queries:
+            query_dir = os.path.join(output_dir, query.name)
+            os.makedirs(query_dir, exist_ok=True)
+            self.run_query(query, os.path.join(query_dir, query.output_name), iterations,
+                           resume=resume)
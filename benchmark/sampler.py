@@ -0,0 +1,84 @@
+"""
+Hilo de muestreo de potencia durante la ejecución de una query
+"""
+import threading
+import time
+
+from .config import ENDPOINTS, SAMPLE_INTERVAL, SAMPLE_POLICY
+from .power import PowerReader, sample_instant, total_power
+from .schedule import FixedRateSchedule
+
+
+class Sampler:
+    """
+    Un único sampler para todo el proceso: se arranca y detiene en cada
+    iteración y escribe cada muestra en el writer activo.
+    """
+
+    def __init__(self, endpoints=ENDPOINTS, interval=SAMPLE_INTERVAL,
+                 policy=SAMPLE_POLICY):
+        self.endpoints = endpoints
+        self.interval = interval
+        self.policy = policy
+        self.reader = PowerReader(endpoints)
+        self.writer = None
+        self.schedule = None
+        self._stop = None
+        self._thread = None
+
+    def read(self):
+        """Lectura puntual y simultánea de todos los nodos ({nodo: Reading})"""
+        return self.reader.read()
+
+    def close(self):
+        self.stop()
+        self.reader.close()
+
+    def start(self, writer, query_name, iteration, start_time):
+        """`start_time` en reloj time.monotonic()"""
+        if self._thread is not None:
+            # Un hilo anterior que no terminó a tiempo: su evento ya está
+            # activado, se espera a que acabe su último scrape
+            self._thread.join()
+            self._thread = None
+        self.writer = writer
+        self.schedule = FixedRateSchedule(self.interval, start_time, self.policy)
+        # Evento propio por ejecución: un hilo rezagado nunca ve el clear()
+        # de la siguiente
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._loop,
+            args=(writer, self.schedule, self._stop, query_name, iteration, start_time),
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Detiene el muestreo y espera al hilo (un scrape en curso dura como
+        mucho el timeout de power.py); si tras `timeout` sigue vivo se
+        conserva y start() lo espera antes de arrancar otro
+        """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            print("  ⚠️  El hilo de muestreo sigue terminando un scrape")
+            return
+        self._thread = None
+        if self.schedule.skipped:
+            print(f"  ⚠️  {self.schedule.skipped} ticks de muestreo perdidos")
+
+    def _loop(self, writer, schedule, stop, query_name, iteration, start_time):
+        """Toma samples en cada plazo y los escribe en el writer de su iteración"""
+        while True:
+            deadline = schedule.wait(stop)
+            if deadline is None:
+                break
+            jitter = time.monotonic() - deadline
+            readings = self.read()
+            elapsed = sample_instant(readings) - start_time
+            writer.write_sample(query_name, iteration, elapsed, readings, jitter)
+            total = total_power(readings)
+            print(f"  📊 Sample en t={elapsed:.1f}s: {total/1000:.2f} mW")
@@ -0,0 +1,45 @@
+"""
+Planificador de muestreo a tasa fija sobre plazos absolutos (sin deriva)
+"""
+import time
+
+# Política ante ticks perdidos (scrape o escritura más lentos que el intervalo):
+#   "skip":    salta al siguiente plazo futuro; el periodo se mantiene
+#   "catchup": dispara los ticks atrasados uno tras otro hasta ponerse al día
+POLICIES = ("skip", "catchup")
+
+
+class FixedRateSchedule:
+    """
+    El tick k vence en start + k*interval (reloj monotónico), de modo que el
+    tiempo de scrape y de escritura no se acumula en el periodo real.
+    """
+
+    def __init__(self, interval, start=None, policy="skip"):
+        if policy not in POLICIES:
+            raise ValueError(f"Política de muestreo desconocida: {policy}")
+        self.interval = interval
+        self.start = time.monotonic() if start is None else start
+        self.policy = policy
+        self.tick = 0
+        self.skipped = 0
+
+    def deadline(self):
+        return self.start + self.tick * self.interval
+
+    def wait(self, stop_event):
+        """
+        Bloquea hasta el siguiente plazo y lo devuelve; None si `stop_event`
+        se activa antes.
+        """
+        deadline = self.deadline()
+        now = time.monotonic()
+        if self.policy == "skip" and now - deadline >= self.interval:
+            missed = int((now - deadline) // self.interval)
+            self.tick += missed
+            self.skipped += missed
+            deadline = self.deadline()
+        if stop_event.wait(max(0.0, deadline - now)):
+            return None
+        self.tick += 1
+        return deadline
@@ -0,0 +1,25 @@
+"""
+Punto de entrada para los scripts históricos en sin_diseño/Q*/ e indices/Q*/
+"""
+import os
+
+from .config import ITERATIONS, OUTPUT_FORMATS
+from .queries import get_queries
+from .runner import Runner
+
+
+def run_script(schema, name, script_file, iterations=ITERATIONS,
+               start_iteration=1, output_name=None, formats=OUTPUT_FORMATS, resume=True):
+    """
+    Ejecuta una query escribiendo los resultados junto al script que la
+    invoca; si una ejecución anterior se cortó, continúa donde lo dejó
+    """
+    query = get_queries(schema, [name])[0]
+    stem = os.path.join(os.path.dirname(os.path.abspath(script_file)),
+                        output_name or query.output_name)
+    runner = Runner(formats=formats)
+    try:
+        runner.ping()
+        runner.run_query(query, stem, iterations, start_iteration, resume)
+    finally:
+        runner.close()
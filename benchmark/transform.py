@@ -0,0 +1,297 @@
+"""
+Construye el esquema embebido (sin_diseno) a partir del normalizado (indices)
+
+    python -m benchmark.transform                        # reanuda si se cortó
+    python -m benchmark.transform --workers 16 --drop    # desde cero
+
+tpch_sin_diseno.orders + lineitems      -> tpch_optimized.orders_with_lineitems
+tpch_sin_diseno.parts + partsupps       -> tpch_optimized.parts_with_suppliers
+                 (+ suppliers, nations)
+tpch_sin_diseno.customers / suppliers   -> tpch_optimized.customers / suppliers
+                                           con el nombre de su nación
+
+Cada colección se parte en rangos de su clave TPC-H (o_orderkey, p_partkey,
+...), que con loader.py coincide con el _id y es la clave de shard; en otras
+cargas se crea antes un índice por cada clave de lectura (SOURCE_KEYS). Cada
+proceso lee su rango de padres e hijos ordenados por esa clave y los une
+en streaming, así que en memoria solo hay un lote de documentos a la vez.
+Los rangos terminados se apuntan en tpch_optimized.transform_progress; al
+relanzar se saltan y los documentos ya escritos de un rango a medias se
+ignoran como duplicados.
+"""
+import argparse
+import itertools
+import os
+import time
+from datetime import datetime
+from multiprocessing import Pool
+from operator import itemgetter
+
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from .config import MONGOS_URI
+from .indexes import IndexMismatch, build_specs, existing_indexes, verify_specs
+from .loader import BATCH, SHARD_KEYS, _flush, _worker_client, presplit
+from .queries import indices, sin_diseno
+
+SOURCE = indices.DATABASE
+TARGET = sin_diseno.DATABASE
+PROGRESS = "transform_progress"
+PARTITIONS = 64
+
+# colección destino -> (colección padre, clave del padre)
+PARENTS = {
+    "orders_with_lineitems": ("orders", "o_orderkey"),
+    "parts_with_suppliers": ("parts", "p_partkey"),
+    "customers": ("customers", "c_custkey"),
+    "suppliers": ("suppliers", "s_suppkey"),
+}
+
+# colección destino -> (colección origen, clave) de cada lectura por rangos
+SOURCE_KEYS = {
+    "orders_with_lineitems": [("orders", "o_orderkey"), ("lineitems", "l_orderkey")],
+    "parts_with_suppliers": [("parts", "p_partkey"), ("partsupps", "ps_partkey")],
+    "customers": [("customers", "c_custkey")],
+    "suppliers": [("suppliers", "s_suppkey")],
+}
+
+
+def _strip_id(doc):
+    doc.pop("_id", None)
+    return doc
+
+
+def _range_cursor(db, collection, key, start, stop):
+    return db[collection].find({key: {"$gte": start, "$lt": stop}},
+                               sort=[(key, 1)], batch_size=BATCH, allow_disk_use=True)
+
+
+def embed(parents, children, parent_key, child_key):
+    """
+    (padre, [hijos]) uniendo dos cursores ordenados por la misma clave; solo
+    guarda en memoria los hijos del padre actual
+    """
+    groups = itertools.groupby(children, key=itemgetter(child_key))
+    current = next(groups, None)
+    for parent in parents:
+        key = parent[parent_key]
+        while current is not None and current[0] < key:
+            current = next(groups, None)
+        if current is not None and current[0] == key:
+            yield parent, list(current[1])
+            current = next(groups, None)
+        else:
+            yield parent, []
+
+
+def _nation_names(db):
+    return {n["n_nationkey"]: n["n_name"]
+            for n in db.nations.find({}, {"n_nationkey": 1, "n_name": 1})}
+
+
+def _orders(source, start, stop, nations):
+    pairs = embed(_range_cursor(source, "orders", "o_orderkey", start, stop),
+                  _range_cursor(source, "lineitems", "l_orderkey", start, stop),
+                  "o_orderkey", "l_orderkey")
+    for order, lineitems in pairs:
+        lineitems = [_strip_id(li) for li in sorted(lineitems, key=itemgetter("l_linenumber"))]
+        yield [dict(order, _id=order["o_orderkey"], lineitems=lineitems)]
+
+
+def _parts(source, start, stop, nations):
+    pairs = embed(_range_cursor(source, "parts", "p_partkey", start, stop),
+                  _range_cursor(source, "partsupps", "ps_partkey", start, stop),
+                  "p_partkey", "ps_partkey")
+    # Los proveedores se piden por lotes de partes: nunca toda la tabla en memoria
+    while True:
+        chunk = list(itertools.islice(pairs, BATCH))
+        if not chunk:
+            return
+        keys = {ps["ps_suppkey"] for _, partsupps in chunk for ps in partsupps}
+        suppliers = {s["s_suppkey"]: _strip_id(s)
+                     for s in source.suppliers.find({"s_suppkey": {"$in": list(keys)}})}
+        for part, partsupps in chunk:
+            embedded = []
+            for ps in partsupps:
+                supplier = suppliers.get(ps["ps_suppkey"])
+                if supplier is None:
+                    continue
+                embedded.append(dict(supplier, s_nation_name=nations.get(supplier["s_nationkey"]),
+                                     ps_availqty=ps["ps_availqty"],
+                                     ps_supplycost=ps["ps_supplycost"],
+                                     ps_comment=ps.get("ps_comment")))
+            yield [dict(part, _id=part["p_partkey"], suppliers=embedded)]
+
+
+def _with_nation(collection, key, prefix):
+    def build(source, start, stop, nations):
+        for doc in _range_cursor(source, collection, key, start, stop):
+            doc = dict(doc, _id=doc[key])
+            doc[f"{prefix}_nation_name"] = nations.get(doc[f"{prefix}_nationkey"])
+            yield [doc]
+    return build
+
+
+BUILDERS = {
+    "orders_with_lineitems": _orders,
+    "parts_with_suppliers": _parts,
+    "customers": _with_nation("customers", "c_custkey", "c"),
+    "suppliers": _with_nation("suppliers", "s_suppkey", "s"),
+}
+
+
+def transform_partition(task):
+    """Escribe en TARGET los documentos de la clave [start, stop) de una colección"""
+    uri, collection, start, stop = task
+    client = _worker_client(uri)
+    source, target = client[SOURCE], client[TARGET]
+    t0 = time.monotonic()
+    nations = _nation_names(source)
+    buffer = []
+    written = 0
+    for docs in BUILDERS[collection](source, start, stop, nations):
+        buffer.extend(docs)
+        if len(buffer) >= BATCH:
+            written += _flush(target, collection, buffer)
+            buffer.clear()
+    written += _flush(target, collection, buffer)
+    return collection, start, stop, written, time.monotonic() - t0
+
+
+def _sorts_by(indexes, key):
+    """Algún índice (no hashed) empieza por `key`: sirve para rango + sort"""
+    return any(spec and spec[0][0] == key and spec[0][1] in (1, -1)
+               for spec in indexes.values())
+
+
+def ensure_source_indexes(client, collections):
+    """
+    Cada partición lee un rango de la clave ordenado por ella; sin un índice
+    que empiece por esa clave sería un COLLSCAN + sort en disco por rango.
+    Con loader.py son las claves de shard; si faltan se crean (<clave>_1).
+    IndexMismatch si no se pueden crear.
+    """
+    current = existing_indexes(client[SOURCE])
+    missing = {}
+    for target in collections:
+        for collection, key in SOURCE_KEYS[target]:
+            if not _sorts_by(current.get(collection, {}), key):
+                missing.setdefault(collection, []).append((f"{key}_1", [(key, 1)]))
+    if not missing:
+        return
+    names = [f"{collection}.{name}" for collection, specs in missing.items() for name, _ in specs]
+    print(f"🔨 {SOURCE}: sin índice para leer por rangos, se crean {', '.join(names)}")
+    try:
+        build_specs(client, SOURCE, missing)
+    except PyMongoError as e:
+        raise IndexMismatch(f"no se pudieron crear {', '.join(names)} en {SOURCE}: {e}") from e
+    verify_specs(client, SOURCE, missing, "los índices de lectura por rangos")
+
+
+def key_bounds(db, collection, key):
+    """(mínimo, máximo + 1) de `key`, o None si la colección está vacía"""
+    first = db[collection].find_one({}, {key: 1}, sort=[(key, 1)])
+    last = db[collection].find_one({}, {key: 1}, sort=[(key, -1)])
+    if first is None:
+        return None
+    return first[key], last[key] + 1
+
+
+def key_ranges(low, high, count):
+    """[start, stop) de `count` rangos contiguos de claves enteras en [low, high)"""
+    count = max(1, min(count, high - low))
+    bounds = [low + (high - low) * i // count for i in range(count + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _progress_id(collection, start, stop):
+    return f"{collection}:{start}-{stop}"
+
+
+def transform(uri=MONGOS_URI, collections=tuple(BUILDERS), workers=None,
+              partitions=PARTITIONS, drop=False):
+    workers = workers or os.cpu_count()
+    client = MongoClient(uri)
+    try:
+        source, target = client[SOURCE], client[TARGET]
+        if drop:
+            print(f"🗑️  Borrando {TARGET}")
+            client.drop_database(TARGET)
+        for name in ("nations", "regions"):
+            _flush(target, name, list(source[name].find()))
+        ensure_source_indexes(client, collections)
+
+        done = {p["_id"] for p in target[PROGRESS].find({}, {"_id": 1})}
+        tasks = []
+        for collection in collections:
+            parent, key = PARENTS[collection]
+            bounds = key_bounds(source, parent, key)
+            if bounds is None:
+                print(f"  ⚠️  {SOURCE}.{parent} vacía: se omite {collection}")
+                continue
+            ranges = key_ranges(*bounds, partitions)
+            shard_key = SHARD_KEYS.get((TARGET, collection))
+            if shard_key:
+                presplit(client, TARGET, collection, shard_key, [start for start, _ in ranges[1:]])
+            pending = [(uri, collection, start, stop) for start, stop in ranges
+                       if _progress_id(collection, start, stop) not in done]
+            if len(pending) < len(ranges):
+                print(f"♻️  {collection}: {len(ranges) - len(pending)}/{len(ranges)} rangos ya hechos")
+            tasks += pending
+    finally:
+        client.close()
+
+    if not tasks:
+        print(f"✅ {TARGET} ya estaba completa: nada que transformar")
+        return
+
+    print(f"🔀 {SOURCE} → {TARGET}: {len(tasks)} rangos, {workers} procesos")
+    start = time.monotonic()
+    documents_written = 0
+    client = MongoClient(uri)
+    try:
+        progress = client[TARGET][PROGRESS]
+        with Pool(workers) as pool:
+            for done_count, (collection, low, high, written, elapsed) in enumerate(
+                    pool.imap_unordered(transform_partition, tasks), 1):
+                progress.replace_one({"_id": _progress_id(collection, low, high)}, {
+                    "collection": collection, "start": low, "stop": high,
+                    "documents": written, "seconds": round(elapsed, 3),
+                    "finished": datetime.now()
+                }, upsert=True)
+                documents_written += written
+                total_elapsed = time.monotonic() - start
+                print(f"  📦 [{done_count}/{len(tasks)}] {collection} [{low}, {high}): "
+                      f"{written} documentos en {elapsed:.1f}s — "
+                      f"total {documents_written / total_elapsed:,.0f} docs/s")
+    finally:
+        client.close()
+    print(f"✅ {documents_written} documentos en {time.monotonic() - start:.1f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmark.transform", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("collections", nargs="*",
+                        help=f"colecciones destino (por defecto todas: {', '.join(BUILDERS)})")
+    parser.add_argument("--workers", type=int, default=None, help="procesos (por defecto nº de CPUs)")
+    parser.add_argument("--partitions", type=int, default=PARTITIONS,
+                        help="rangos por colección (mantenlo igual al reanudar)")
+    parser.add_argument("--drop", action="store_true", help=f"borra antes {TARGET}")
+    parser.add_argument("--uri", default=MONGOS_URI)
+    args = parser.parse_args(argv)
+    unknown = set(args.collections) - set(BUILDERS)
+    if unknown:
+        parser.error(f"colecciones desconocidas: {', '.join(sorted(unknown))}")
+
+    try:
+        transform(args.uri, tuple(args.collections) or tuple(BUILDERS), args.workers,
+                  args.partitions, args.drop)
+    except IndexMismatch as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
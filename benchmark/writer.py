@@ -0,0 +1,343 @@
+"""
+Sinks de muestras de energía (1 sample = 1 fila)
+
+Cada muestra se construye una vez como fila tipada y se reparte a los
+formatos configurados: Parquet / Arrow IPC (columnas tipadas, escritas por
+lotes = row groups) y CSV como exportación opcional compatible con los
+q*_energy_metrics.csv históricos.
+
+Parquet y Arrow sólo son legibles tras escribir su footer, así que se
+guardan como directorio con un fichero cerrado por iteración
+(q6_energy_metrics.parquet/iteration-0001.parquet, ...): un corte sólo
+pierde la iteración en curso. pyarrow lee el directorio como una tabla.
+"""
+import csv
+import glob
+import math
+import os
+import re
+import queue
+import threading
+import time
+from datetime import datetime
+
+from .config import (
+    CSV_FIELDNAMES, OUTPUT_BATCH_ROWS, WRITER_BUFFER_ROWS, WRITER_FLUSH_ROWS,
+    WRITER_FLUSH_SECONDS
+)
+from .power import reading_skew
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pyarrow es opcional: sin él sólo hay CSV
+    pa = None
+
+NODES = ("shard1", "shard2", "shard3")
+
+
+def sample_row(query_name, iteration, elapsed, readings, jitter=None):
+    """Fila tipada: watts en float64, timestamp en ns (int64), jitter NaN si no aplica"""
+    p1, p2, p3 = (readings[n].microwatts if n in readings else 0 for n in NODES)
+    return {
+        "query": query_name,
+        "iteration": int(iteration),
+        "elapsed_time_seconds": float(elapsed),
+        "power_shard1_watts": p1 / 1_000_000,
+        "power_shard2_watts": p2 / 1_000_000,
+        "power_shard3_watts": p3 / 1_000_000,
+        "power_total_watts": (p1 + p2 + p3) / 1_000_000,
+        "timestamp_ns": time.time_ns(),
+        "scrape_skew_ms": reading_skew(readings) * 1000,
+        "sample_jitter_ms": float("nan") if jitter is None else jitter * 1000,
+    }
+
+
+class CsvWriter:
+    """Exportación CSV con el formato de siempre"""
+    extension = ".csv"
+
+    def __init__(self, path, append=False):
+        self.path = path
+        append = append and os.path.exists(path) and os.path.getsize(path) > 0
+        self.handle = open(path, 'a' if append else 'w', newline='')
+        self.writer = csv.DictWriter(self.handle, fieldnames=CSV_FIELDNAMES)
+        if not append:
+            self.writer.writeheader()
+        self.handle.flush()
+
+    def write_row(self, row):
+        jitter = row["sample_jitter_ms"]
+        self.writer.writerow({
+            "query": row["query"],
+            "iteration": row["iteration"],
+            "elapsed_time_seconds": f"{row['elapsed_time_seconds']:.3f}",
+            "power_shard1_watts": f"{row['power_shard1_watts']:.6f}",
+            "power_shard2_watts": f"{row['power_shard2_watts']:.6f}",
+            "power_shard3_watts": f"{row['power_shard3_watts']:.6f}",
+            "power_total_watts": f"{row['power_total_watts']:.6f}",
+            "timestamp": datetime.fromtimestamp(row["timestamp_ns"] / 1e9).isoformat(),
+            "scrape_skew_ms": f"{row['scrape_skew_ms']:.1f}",
+            "sample_jitter_ms": "" if math.isnan(jitter) else f"{jitter:.1f}"
+        })
+
+    def flush(self):
+        self.handle.flush()
+
+    def sync(self):
+        """flush + fsync: lo escrito sobrevive a un corte"""
+        self.handle.flush()
+        os.fsync(self.handle.fileno())
+
+    def close(self):
+        self.handle.close()
+
+
+def sample_schema():
+    return pa.schema([
+        ("query", pa.string()),
+        ("iteration", pa.int32()),
+        ("elapsed_time_seconds", pa.float64()),
+        ("power_shard1_watts", pa.float64()),
+        ("power_shard2_watts", pa.float64()),
+        ("power_shard3_watts", pa.float64()),
+        ("power_total_watts", pa.float64()),
+        ("timestamp_ns", pa.int64()),
+        ("scrape_skew_ms", pa.float64()),
+        ("sample_jitter_ms", pa.float64()),
+    ])
+
+
+class ArrowWriter:
+    """
+    Parquet (`fmt="parquet"`) o Arrow IPC (`fmt="arrow"`) en el directorio
+    `path`. Las filas se acumulan por columnas y se escriben en lotes de
+    `batch_rows`; cada sync (fin de iteración) cierra el segmento en curso,
+    y la siguiente fila abre uno nuevo con el número de su iteración.
+    """
+
+    def __init__(self, path, fmt="parquet", batch_rows=OUTPUT_BATCH_ROWS):
+        if pa is None:
+            raise ImportError("pyarrow no está instalado: usa el formato csv")
+        self.path = path
+        self.fmt = fmt
+        self.batch_rows = batch_rows
+        self.schema = sample_schema()
+        self._columns = {name: [] for name in self.schema.names}
+        self._file = None
+        self._writer = None
+        self._iteration = None
+        self._synced = set()
+        os.makedirs(path, exist_ok=True)
+
+    @property
+    def extension(self):
+        return ".parquet" if self.fmt == "parquet" else ".arrow"
+
+    def segment_path(self, iteration):
+        return os.path.join(self.path, f"iteration-{iteration:04d}{self.extension}")
+
+    def write_row(self, row):
+        iteration = row["iteration"]
+        if iteration in self._synced:
+            # Su segmento ya tiene footer, fsync y checkpoint: no se reabre
+            print(f"  ⚠️  Muestra tardía de la iteración {iteration}, ya cerrada: se descarta")
+            return
+        if self._writer is None and not self._open_segment(iteration):
+            return
+        for name, values in self._columns.items():
+            values.append(row[name])
+        if len(self._columns["query"]) >= self.batch_rows:
+            self._write_batch()
+
+    def flush(self):
+        """Los lotes se escriben al llenarse; aquí no hay nada que forzar"""
+
+    def sync(self):
+        """Cierra el segmento en curso (footer incluido) y hace fsync"""
+        if self._writer is None:
+            return
+        self._write_batch()
+        self._writer.close()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        self._writer = None
+        self._synced.add(self._iteration)
+
+    def _open_segment(self, iteration):
+        """Crea el segmento de `iteration`; False si ya existía (nunca se trunca)"""
+        try:
+            self._file = open(self.segment_path(iteration), "xb")
+        except FileExistsError:
+            print(f"  ⚠️  {self.segment_path(iteration)} ya existe: no se sobrescribe")
+            self._synced.add(iteration)
+            return False
+        self._iteration = iteration
+        if self.fmt == "parquet":
+            self._writer = pa.parquet.ParquetWriter(self._file, self.schema)
+        else:
+            self._writer = pa.ipc.new_file(self._file, self.schema)
+        return True
+
+    def _write_batch(self):
+        if not self._columns["query"]:
+            return
+        batch = pa.record_batch(
+            [pa.array(self._columns[f.name], type=f.type) for f in self.schema],
+            schema=self.schema
+        )
+        if self.fmt == "parquet":
+            self._writer.write_batch(batch)
+        else:
+            self._writer.write(batch)
+        for values in self._columns.values():
+            values.clear()
+
+    def close(self):
+        self.sync()
+
+
+_SEGMENT = re.compile(r"iteration-(\d+)\.(parquet|arrow)$")
+
+
+def prune_segments(path, keep=()):
+    """
+    Borra los segmentos de `path` cuyas iteraciones no están en `keep`
+    (restos de una iteración interrumpida, o una ejecución anterior)
+    """
+    for segment in glob.glob(os.path.join(path, "iteration-*")):
+        match = _SEGMENT.search(segment)
+        if match and int(match.group(1)) not in keep:
+            os.remove(segment)
+
+
+EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+
+def open_sink(stem, fmt, append=False):
+    path = stem + EXTENSIONS[fmt]
+    if fmt == "csv":
+        return CsvWriter(path, append)
+    return ArrowWriter(path, fmt)
+
+
+class BufferedWriter:
+    """
+    Único dueño de los ficheros de resultados. Sampler (muestras periódicas)
+    y Runner (muestra final, cierre de iteración) sólo encolan; un hilo
+    escritor dedicado vacía la cola en los sinks, hace flush cada
+    `flush_rows` filas o `flush_seconds` segundos y fsync en cada
+    end_iteration(). Así no hay dos hilos tocando el mismo handle.
+    Con `append` (reanudación) el CSV se continúa en vez de reescribirse.
+    """
+
+    def __init__(self, stem, formats, processes=None, append=False,
+                 buffer_rows=WRITER_BUFFER_ROWS, flush_rows=WRITER_FLUSH_ROWS,
+                 flush_seconds=WRITER_FLUSH_SECONDS):
+        self.processes = processes
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.sinks = []
+        for fmt in formats:
+            if fmt != "csv" and pa is None:
+                print(f"⚠️  pyarrow no disponible: se omite {fmt}")
+                continue
+            self.sinks.append(open_sink(stem, fmt, append))
+        if not self.sinks:
+            self.sinks.append(open_sink(stem, "csv", append))
+        # Cola acotada: si el disco se atasca, el productor espera en vez de
+        # perder filas
+        self._queue = queue.Queue(maxsize=buffer_rows)
+        self._error = None
+        self._thread = threading.Thread(target=self._loop, name="writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def paths(self):
+        return [s.path for s in self.sinks]
+
+    def write_sample(self, query_name, iteration, elapsed, readings, jitter=None):
+        """
+        `readings` es {shardN: Reading} y `jitter` el retraso (s) respecto al
+        plazo del planificador (None: muestra fuera de plan)
+        """
+        row = sample_row(query_name, iteration, elapsed, readings, jitter)
+        self._queue.put(("sample", row, elapsed, readings))
+
+    def end_iteration(self, callback=None):
+        """
+        Barrera de fin de iteración: espera a que todo lo encolado esté
+        escrito, hace fsync y ejecuta `callback` en el hilo escritor
+        """
+        done = threading.Event()
+        self._queue.put(("sync", callback, done))
+        done.wait()
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        try:
+            if self._thread.is_alive():
+                self.end_iteration()
+        finally:
+            # Aunque el último sync falle, el hilo se para y los sinks se
+            # cierran (footers de Parquet incluidos)
+            if self._thread.is_alive():
+                self._queue.put(("stop",))
+                self._thread.join()
+            for sink in self.sinks:
+                sink.close()
+
+    def _loop(self):
+        pending = 0
+        last_flush = time.monotonic()
+        while True:
+            timeout = max(0.0, last_flush + self.flush_seconds - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            try:
+                if item is None:
+                    pass
+                elif item[0] == "sample":
+                    _, row, elapsed, readings = item
+                    if self.processes is not None:
+                        self.processes.add(elapsed, readings)
+                    for sink in self.sinks:
+                        sink.write_row(row)
+                    pending += 1
+                elif item[0] == "sync":
+                    _, callback, done = item
+                    try:
+                        for sink in self.sinks:
+                            sink.sync()
+                        if callback is not None:
+                            callback()
+                    except Exception as e:
+                        # Antes de done.set(): end_iteration() debe ver el error
+                        print(f"❌ Error escribiendo resultados: {e}")
+                        self._error = e
+                    finally:
+                        pending = 0
+                        last_flush = time.monotonic()
+                        done.set()
+                    continue
+                else:
+                    return
+
+                if pending and (pending >= self.flush_rows or
+                                time.monotonic() - last_flush >= self.flush_seconds):
+                    for sink in self.sinks:
+                        sink.flush()
+                    pending = 0
+                    last_flush = time.monotonic()
+                elif not pending:
+                    last_flush = time.monotonic()
+            except Exception as e:
+                print(f"❌ Error escribiendo resultados: {e}")
+                self._error = e
@@ -1,306 +1,13 @@
 #!/usr/bin/env python3
-import requests
-import time
-from pymongo import MongoClient
-import threading
-import csv
-import subprocess
-from datetime import datetime
-import signal
+"""
+Q6 TPC-H (indices): 30 iteraciones
+La query y el runner viven en benchmark/ (ver benchmark/queries/indices.py)
+"""
+import os
+import sys
 
-MONGOS_URI = "mongodb://10.145.0.173:27017/"
-ENDPOINTS = {
-    "shard1": "http://10.145.0.173:8080/metrics",
-    "shard2": "http://10.145.0.175:8080/metrics",
-    "shard3": "http://10.145.0.176:8080/metrics"
-}
-SAMPLE_INTERVAL = 2
-ITERATIONS = 30
-QUERY_TIMEOUT = 7200  # 2 horas = 7200 segundos
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
 
-sampling = False
-csv_writer = None
-csv_file_handle = None
-query_timed_out = False
+from benchmark import run_script
 
-class TimeoutException(Exception):
-    pass
-
-def timeout_handler(signum, frame):
-    raise TimeoutException("Query excedió el tiempo límite de 2 horas")
-
-def get_power(endpoint):
-    try:
-        resp = requests.get(endpoint, timeout=2)
-        power = 0
-        for line in resp.text.split('\n'):
-            if 'scaph_process_power_consumption_microwatts' in line and \
-               ('mongod' in line or 'mongos' in line) and not line.startswith('#'):
-                try:
-                    power += float(line.split()[-1])
-                except (ValueError, IndexError):
-                    continue
-        return power
-    except Exception as e:
-        print(f"⚠️  Error obteniendo métricas: {e}")
-        return 0
-
-def clear_ram_and_restart_mongodb():
-    """Limpia caché del SO y reinicia MongoDB para caché frío"""
-    # Limpiar RAM del SO
-    print("  🧹 Limpiando RAM local (10.145.0.173)...")
-    try:
-        subprocess.run(['sudo', '/usr/local/bin/clean_ram.sh'],
-                      check=True, capture_output=True, timeout=10)
-        print("  ✅ RAM del SO limpiada en 10.145.0.173")
-    except Exception as e:
-        print(f"  ⚠️  Error limpiando RAM local: {e}")
-
-    remote_hosts = ["10.145.0.175", "10.145.0.176"]
-    for host in remote_hosts:
-        cmd = ['ssh', f'martin@{host}', 'sudo', '/usr/local/bin/clean_ram.sh']
-        try:
-            subprocess.run(cmd, check=True, capture_output=True, timeout=10)
-            print(f"  ✅ RAM del SO limpiada en {host}")
-        except Exception as e:
-            print(f"  ⚠️  Error limpiando RAM en {host}: {e}")
-    
-    print("  🔄 Reiniciando MongoDB para limpiar caché interno...")
-    
-    # ✅ Reiniciar servicios correctos en 10.145.0.173
-    local_services = ['mongod-shard1', 'mongod-config']
-    for service in local_services:
-        try:
-            subprocess.run(['sudo', 'systemctl', 'restart', service],
-                          check=True, capture_output=True, timeout=30)
-            print(f"  ✅ {service} reiniciado en 10.145.0.173")
-        except Exception as e:
-            print(f"  ⚠️  Error reiniciando {service}: {e}")
-    
-    # Reiniciar mongod en shards remotos (ellos usan "mongod" genérico)
-    for host in remote_hosts:
-        cmd = ['ssh', f'martin@{host}', 'sudo', 'systemctl', 'restart', 'mongod']
-        try:
-            subprocess.run(cmd, check=True, capture_output=True, timeout=30)
-            print(f"  ✅ MongoDB reiniciado en {host}")
-        except Exception as e:
-            print(f"  ⚠️  Error reiniciando MongoDB en {host}: {e}")
-    
-    print("  ⏳ Esperando 20 segundos para que MongoDB arranque...")
-    time.sleep(20)
-    
-    # Verificar MongoDB
-    retry_count = 0
-    max_retries = 10
-    while retry_count < max_retries:
-        try:
-            test_client = MongoClient(MONGOS_URI, serverSelectionTimeoutMS=2000)
-            test_client.admin.command('ping')
-            test_client.close()
-            print("  ✅ MongoDB listo y accesible")
-            break
-        except Exception as e:
-            retry_count += 1
-            if retry_count < max_retries:
-                print(f"  ⏳ Esperando MongoDB... intento {retry_count}/{max_retries}")
-                time.sleep(3)
-            else:
-                print(f"  ⚠️  MongoDB no responde después de {max_retries} intentos")
-                raise
-
-def sample(query_name, iteration, start_time):
-    """Toma samples y los escribe DIRECTAMENTE al CSV"""
-    global sampling, csv_writer, csv_file_handle
-    while sampling:
-        timestamp = time.time()
-        elapsed = timestamp - start_time
-        p1 = get_power(ENDPOINTS["shard1"])
-        p2 = get_power(ENDPOINTS["shard2"])
-        p3 = get_power(ENDPOINTS["shard3"])
-
-        csv_writer.writerow({
-            "query": query_name,
-            "iteration": iteration,
-            "elapsed_time_seconds": f"{elapsed:.3f}",
-            "power_shard1_watts": f"{p1/1_000_000:.6f}",
-            "power_shard2_watts": f"{p2/1_000_000:.6f}",
-            "power_shard3_watts": f"{p3/1_000_000:.6f}",
-            "power_total_watts": f"{(p1+p2+p3)/1_000_000:.6f}",
-            "timestamp": datetime.now().isoformat()
-        })
-        csv_file_handle.flush()
-        print(f"  📊 Sample en t={elapsed:.1f}s: {(p1+p2+p3)/1000:.2f} mW")
-        time.sleep(SAMPLE_INTERVAL)
-
-print("="*70)
-print("🧪 TPC-H Query 6: Forecasting Revenue Change Query")
-print("🧊 MODO: Caché frío (reinicia MongoDB cada iteración)")
-print(f"📊 Iteraciones: {ITERATIONS}")
-print(f"⏱️  Sampling: cada {SAMPLE_INTERVAL} segundos")
-print(f"⏰ Timeout por iteración: {QUERY_TIMEOUT/3600:.1f} horas")
-print("="*70)
-
-client = MongoClient(MONGOS_URI, serverSelectionTimeoutMS=5000)
-db = client.tpch_sin_diseno
-
-try:
-    db.command("ping")
-    print("✅ Conectado a MongoDB")
-
-    count = db.lineitems.estimated_document_count()
-    print(f"📊 Documentos en lineitems: ~{count:,}")
-    print("")
-
-except Exception as e:
-    print(f"❌ Error: {e}")
-    exit(1)
-
-# ============================================================
-# TPC-H Query 6: Forecasting Revenue Change Query
-# ============================================================
-START_DATE = datetime(1994, 1, 1)
-END_DATE = datetime(1995, 1, 1)
-DISCOUNT = 0.06
-QUANTITY_LIMIT = 24
-
-pipeline_q6 = [
-    {
-        "$match": {
-            "l_shipdate": {
-                "$gte": START_DATE,
-                "$lt": END_DATE
-            },
-            "l_discount": {
-                "$gte": DISCOUNT - 0.01,
-                "$lte": DISCOUNT + 0.01
-            },
-            "l_quantity": { "$lt": QUANTITY_LIMIT }
-        }
-    },
-    {
-        "$group": {
-            "_id": None,
-            "revenue": {
-                "$sum": { "$multiply": ["$l_extendedprice", "$l_discount"] }
-            }
-        }
-    },
-    {
-        "$project": {
-            "_id": 0,
-            "revenue": { "$round": ["$revenue", 2] }
-        }
-    }
-]
-
-# Abrir CSV
-csv_file = "q6_energy_metrics.csv"
-csv_file_handle = open(csv_file, 'w', newline='')
-csv_writer = csv.DictWriter(csv_file_handle, fieldnames=[
-    "query", "iteration", "elapsed_time_seconds",
-    "power_shard1_watts", "power_shard2_watts", "power_shard3_watts",
-    "power_total_watts", "timestamp"
-])
-csv_writer.writeheader()
-csv_file_handle.flush()
-
-try:
-    for iteration in range(1, ITERATIONS + 1):
-        print(f"\n{'='*70}")
-        print(f"🔄 Iteración {iteration}/{ITERATIONS}")
-        print(f"{'='*70}")
-        
-        # ✅ LIMPIAR CACHÉ ANTES DE CADA ITERACIÓN
-        print("🧊 Limpiando cachés para ejecución en frío...")
-        clear_ram_and_restart_mongodb()
-        
-        # Reconectar cliente después del reinicio
-        client.close()
-        client = MongoClient(MONGOS_URI, serverSelectionTimeoutMS=5000)
-        db = client.tpch_sin_diseno
-
-        sampling = True
-        start_time = time.time()
-        sampler = threading.Thread(
-            target=sample,
-            args=("Q6_Forecasting_Revenue_Change", iteration, start_time),
-            daemon=True
-        )
-        sampler.start()
-
-        # Configurar timeout de 2 horas
-        signal.signal(signal.SIGALRM, timeout_handler)
-        signal.alarm(QUERY_TIMEOUT)
-
-        query_timed_out = False
-
-        print("⏱️  Ejecutando Query 6...")
-        try:
-            cursor = db.lineitems.aggregate(pipeline_q6, allowDiskUse=True)
-
-            # Procesar resultados (solo mostrar en consola, no guardar)
-            result = list(cursor)
-            if result:
-                revenue = result[0]['revenue']
-                print(f"   💰 Revenue: ${revenue:,.2f}")
-                print(f"   ✅ Query completada")
-            else:
-                print(f"   ⚠️  Sin resultados")
-
-            # Cancelar alarma si termina antes
-            signal.alarm(0)
-
-        except TimeoutException:
-            print(f"⏰ TIMEOUT: Query excedió 2 horas en iteración {iteration}")
-            query_timed_out = True
-            signal.alarm(0)
-
-        except Exception as e:
-            print(f"❌ Error en query: {e}")
-            import traceback
-            traceback.print_exc()
-            signal.alarm(0)
-
-        # ✅ DETENER SAMPLING INMEDIATAMENTE
-        duration = time.time() - start_time
-        sampling = False
-        sampler.join(timeout=1)  # Esperar a que termine el último sample
-        
-        # ✅ TOMAR MUESTRA FINAL después de que termine la query
-        print("  📊 Tomando muestra final...")
-        p1 = get_power(ENDPOINTS["shard1"])
-        p2 = get_power(ENDPOINTS["shard2"])
-        p3 = get_power(ENDPOINTS["shard3"])
-        
-        csv_writer.writerow({
-            "query": "Q6_Forecasting_Revenue_Change",
-            "iteration": iteration,
-            "elapsed_time_seconds": f"{duration:.3f}",
-            "power_shard1_watts": f"{p1/1_000_000:.6f}",
-            "power_shard2_watts": f"{p2/1_000_000:.6f}",
-            "power_shard3_watts": f"{p3/1_000_000:.6f}",
-            "power_total_watts": f"{(p1+p2+p3)/1_000_000:.6f}",
-            "timestamp": datetime.now().isoformat()
-        })
-        csv_file_handle.flush()
-        print(f"  ✅ Muestra final: {(p1+p2+p3)/1000:.2f} mW")
-
-        if query_timed_out:
-            print(f"⚠️  Iteración {iteration} cancelada por timeout ({duration/3600:.2f}h)")
-        else:
-            print(f"✅ Completada en {duration:.3f}s ({duration/60:.2f} min)")
-
-        if iteration < ITERATIONS:
-            print(f"\n⏳ Esperando 5 segundos antes de siguiente iteración...")
-            time.sleep(5)
-
-finally:
-    csv_file_handle.close()
-
-print(f"\n{'='*70}")
-print(f"✅ COMPLETADO")
-print(f"{'='*70}")
-print(f"📄 Archivo: {csv_file}")
-print(f"{'='*70}")
-
-client.close()
+run_script("indices", "Q6", __file__)
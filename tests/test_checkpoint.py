@@ -0,0 +1,79 @@
+import json
+import os
+
+from benchmark.checkpoint import Checkpoint
+from benchmark.writer import prune_segments
+
+
+def _write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def test_record_and_load(tmp_path):
+    results = tmp_path / "q6.csv"
+    _write(results, b"header\nrow1\n")
+    path = str(tmp_path / "q6.checkpoint.json")
+
+    checkpoint = Checkpoint.load(path, "Q6_Forecasting")
+    assert checkpoint.completed == []
+    checkpoint.record(2, [str(results), str(tmp_path / "missing.csv")])
+    checkpoint.record(1, [str(results)])
+
+    loaded = Checkpoint.load(path, "Q6_Forecasting")
+    assert loaded.completed == [1, 2]
+    assert loaded.is_done(2) and not loaded.is_done(3)
+    assert loaded.sizes == {str(results): len(b"header\nrow1\n")}
+    assert not os.path.exists(path + ".tmp")
+
+
+def test_restore_truncates_partial_iteration(tmp_path):
+    results = tmp_path / "q6.csv"
+    _write(results, b"header\nrow1\n")
+    checkpoint = Checkpoint.load(str(tmp_path / "q6.checkpoint.json"), "Q6")
+    checkpoint.record(1, [str(results)])
+
+    with open(results, "ab") as f:
+        f.write(b"row2 a medias")
+    Checkpoint.load(checkpoint.path, "Q6").restore_files()
+    assert results.read_bytes() == b"header\nrow1\n"
+
+
+def test_restore_never_grows_files(tmp_path):
+    results = tmp_path / "q6.csv"
+    checkpoint = Checkpoint(str(tmp_path / "q6.checkpoint.json"), "Q6",
+                            completed=[1], sizes={str(results): 100})
+    _write(results, b"corto")
+    checkpoint.restore_files()
+    assert results.read_bytes() == b"corto"
+
+
+def test_other_query_or_unreadable_manifest_starts_over(tmp_path):
+    path = tmp_path / "q6.checkpoint.json"
+    path.write_text(json.dumps({"query": "Q1", "completed": [1, 2], "sizes": {}}))
+    assert Checkpoint.load(str(path), "Q6").completed == []
+
+    path.write_text("{roto")
+    assert Checkpoint.load(str(path), "Q6").completed == []
+
+
+def test_reset_removes_manifest(tmp_path):
+    checkpoint = Checkpoint.load(str(tmp_path / "q6.checkpoint.json"), "Q6")
+    checkpoint.record(1, [])
+    checkpoint.reset()
+    assert checkpoint.completed == [] and not os.path.exists(checkpoint.path)
+
+
+def test_prune_segments_keeps_completed_iterations(tmp_path):
+    directory = tmp_path / "q6_energy_metrics.parquet"
+    directory.mkdir()
+    for name in ("iteration-0001.parquet", "iteration-0002.parquet",
+                 "iteration-0003.parquet", "notes.txt"):
+        _write(directory / name, b"")
+
+    prune_segments(str(directory), keep=[1, 3])
+    assert sorted(os.listdir(directory)) == [
+        "iteration-0001.parquet", "iteration-0003.parquet", "notes.txt"]
+
+    prune_segments(str(directory))
+    assert sorted(os.listdir(directory)) == ["notes.txt"]
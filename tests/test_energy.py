@@ -0,0 +1,84 @@
+import csv
+
+import numpy as np
+import pytest
+
+from benchmark.energy import POWER_COLUMNS, integrate_iterations, load_samples, summarize_queries
+
+# (query, iteración, elapsed, shard1, shard2, shard3, total); la muestra final
+# de Q1/1 (t=3) va al final, como la escriben las queries de indices/
+ROWS = [
+    ("Q1", 1, 0.0, 1.0, 2.0, 7.0, 10.0),
+    ("Q1", 1, 1.0, 2.0, 4.0, 14.0, 20.0),
+    ("Q1", 2, 0.0, 5.0, 5.0, 0.0, 10.0),
+    ("Q1", 2, 2.0, 5.0, 5.0, 0.0, 10.0),
+    ("Q6", 1, 0.0, 0.0, 0.0, 30.0, 30.0),
+    ("Q6", 1, 0.5, 0.0, 0.0, 30.0, 30.0),
+    ("Q1", 1, 3.0, 4.0, 8.0, 28.0, 40.0),
+]
+
+
+def _columns(rows):
+    data = {
+        "query": np.array([r[0] for r in rows], dtype=object),
+        "iteration": np.array([r[1] for r in rows], dtype=np.int64),
+        "elapsed": np.array([r[2] for r in rows], dtype=np.float64),
+    }
+    for i, c in enumerate(POWER_COLUMNS):
+        data[c] = np.array([r[3 + i] for r in rows], dtype=np.float64)
+    return data
+
+
+def _by_key(rows):
+    return {(r["query"], r["iteration"]): r for r in rows}
+
+
+def test_trapezoid_totals():
+    rows = _by_key(integrate_iterations(_columns(ROWS)))
+    assert set(rows) == {("Q1", 1), ("Q1", 2), ("Q6", 1)}
+
+    # Q1/1: 1·(10+20)/2 + 2·(20+40)/2 = 15 + 60
+    q1 = rows[("Q1", 1)]
+    assert q1["samples"] == 3
+    assert q1["duration_seconds"] == pytest.approx(3.0)
+    assert q1["energy_total_joules"] == pytest.approx(75.0)
+    assert q1["energy_shard1_joules"] == pytest.approx(1 * 1.5 + 2 * 3.0)
+    assert q1["energy_shard2_joules"] == pytest.approx(1 * 3.0 + 2 * 6.0)
+    assert q1["energy_shard3_joules"] == pytest.approx(1 * 10.5 + 2 * 21.0)
+    assert q1["avg_power_watts"] == pytest.approx(25.0)
+
+    # Potencia constante: P·t, sin trapecios que crucen iteraciones o queries
+    assert rows[("Q1", 2)]["energy_total_joules"] == pytest.approx(20.0)
+    assert rows[("Q6", 1)]["energy_total_joules"] == pytest.approx(15.0)
+    assert rows[("Q6", 1)]["avg_power_watts"] == pytest.approx(30.0)
+
+
+def test_single_sample_has_no_energy():
+    row, = integrate_iterations(_columns([("Q1", 1, 0.0, 1.0, 1.0, 1.0, 3.0)]))
+    assert row["energy_total_joules"] == 0.0
+    assert np.isnan(row["avg_power_watts"])
+
+
+def test_empty_input():
+    assert integrate_iterations(_columns([])) == []
+
+
+def test_summary_mean_and_interval():
+    summary, = [s for s in summarize_queries(integrate_iterations(_columns(ROWS)))
+                if s["query"] == "Q1"]
+    assert summary["iterations"] == 2
+    assert summary["energy_total_joules_mean"] == pytest.approx((75.0 + 20.0) / 2)
+    # std = 27.5·√2, IC = media ± t95(1)·std/√2 = 47.5 ± 12.706·27.5
+    assert summary["energy_total_joules_std"] == pytest.approx(27.5 * 2 ** 0.5)
+    assert summary["energy_total_joules_ci95_high"] == pytest.approx(47.5 + 12.706 * 27.5)
+
+
+def test_csv_matches_columns(tmp_path):
+    path = tmp_path / "q1_energy_metrics.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["query", "iteration", "elapsed_time_seconds"] + POWER_COLUMNS)
+        for row in ROWS:
+            writer.writerow(row)
+    from_csv = _by_key(integrate_iterations(load_samples([str(path)])))
+    assert from_csv == _by_key(integrate_iterations(_columns(ROWS)))
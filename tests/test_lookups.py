@@ -0,0 +1,83 @@
+from datetime import datetime
+
+import pytest
+
+from benchmark.lookups import apply, rewrite_lookup, rewrite_lookups
+from benchmark.queries import get_queries
+
+
+def _lookups(pipeline):
+    return {stage["$lookup"]["as"]: stage["$lookup"] for stage in pipeline if "$lookup" in stage}
+
+
+def _query(schema, name):
+    query, = get_queries(schema, [name])
+    return query
+
+
+def test_q9_by_partkey():
+    q9 = _query("sin_diseno", "Q9")
+    spec = _lookups(apply(q9.pipeline, "indexed"))["order_lines"]
+    assert spec["localField"] == "p_partkey"
+    assert spec["foreignField"] == "lineitems.l_partkey"
+
+
+def test_q13_by_custkey():
+    q13 = _query("sin_diseno", "Q13")
+    spec = _lookups(apply(q13.pipeline, "indexed"))["orders"]
+    assert spec["localField"] == "c_custkey"
+    assert spec["foreignField"] == "o_custkey"
+
+
+def test_q20_prefilters_shipdate_with_elemmatch():
+    q20 = _query("sin_diseno", "Q20")
+    original = _lookups(q20.pipeline)["lineitem_stats"]
+    spec = _lookups(apply(q20.pipeline, "indexed"))["lineitem_stats"]
+    assert spec["localField"] == "p_partkey"
+    assert spec["foreignField"] == "lineitems.l_partkey"
+    assert spec["pipeline"][0] == {"$match": {"lineitems": {"$elemMatch": {"l_shipdate": {
+        "$gte": datetime(1994, 1, 1), "$lt": datetime(1995, 1, 1)}}}}}
+    # El sub-pipeline original se conserva detrás del prefiltro
+    assert spec["pipeline"][1:] == original["pipeline"]
+
+
+def test_indices_q4_by_orderkey():
+    q4 = _query("indices", "Q4")
+    spec = _lookups(apply(q4.pipeline, "indexed"))["matching_lineitems"]
+    assert (spec["localField"], spec["foreignField"]) == ("o_orderkey", "l_orderkey")
+
+
+def test_correlated_strategy_keeps_pipeline():
+    q9 = _query("sin_diseno", "Q9")
+    assert apply(q9.pipeline, "correlated") is q9.pipeline
+    with pytest.raises(ValueError):
+        apply(q9.pipeline, "hash")
+
+
+def test_rewrite_flips_reversed_comparisons():
+    spec = {
+        "from": "orders_with_lineitems",
+        "let": {"partkey": "$p_partkey"},
+        "pipeline": [
+            {"$unwind": "$lineitems"},
+            {"$match": {"$expr": {"$and": [
+                {"$eq": ["$$partkey", "$lineitems.l_partkey"]},
+                {"$gt": [10, "$lineitems.l_quantity"]},
+            ]}}},
+        ],
+        "as": "lines",
+    }
+    rewritten = rewrite_lookup(spec)
+    assert (rewritten["localField"], rewritten["foreignField"]) == \
+        ("p_partkey", "lineitems.l_partkey")
+    assert rewritten["pipeline"][0] == \
+        {"$match": {"lineitems": {"$elemMatch": {"l_quantity": {"$lt": 10}}}}}
+
+
+def test_rewrite_leaves_unmatched_lookups():
+    uncorrelated = {"from": "customers", "pipeline": [{"$group": {"_id": None}}], "as": "avg"}
+    no_equality = {"from": "orders", "let": {"k": "$c_custkey"},
+                   "pipeline": [{"$match": {"$expr": {"$gt": ["$o_custkey", "$$k"]}}}], "as": "o"}
+    assert rewrite_lookup(uncorrelated) is uncorrelated
+    assert rewrite_lookup(no_equality) is no_equality
+    assert rewrite_lookups([{"$lookup": no_equality}]) == [{"$lookup": no_equality}]
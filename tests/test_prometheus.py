@@ -0,0 +1,57 @@
+from benchmark.prometheus import Sample, iter_samples, parse_labels, parse_line
+
+
+def test_parse_line_with_labels():
+    sample = parse_line('scaph_process_power_consumption_microwatts{pid="42",exe="mongod"} 1500')
+    assert sample == Sample("scaph_process_power_consumption_microwatts",
+                            {"pid": "42", "exe": "mongod"}, 1500.0)
+
+
+def test_parse_line_without_labels():
+    assert parse_line("scaph_host_power_microwatts 2.5e6") == \
+        Sample("scaph_host_power_microwatts", {}, 2.5e6)
+
+
+def test_parse_labels_escapes():
+    assert parse_labels(r'cmd="a\"b",path="c\\d",msg="x\ny"') == \
+        {"cmd": 'a"b', "path": "c\\d", "msg": "x\ny"}
+
+
+def test_parse_line_skips_comments_and_blank_lines():
+    assert parse_line("# HELP scaph_host_power_microwatts Power") is None
+    assert parse_line("   ") is None
+
+
+def test_parse_line_malformed_returns_none():
+    malformed = [
+        'metric{pid} 1',                 # etiqueta sin "="
+        'metric{pid="1} 1',              # comillas sin cerrar
+        'metric{pid="1" 1',              # llave sin cerrar
+        'metric{pid=1} 1',               # valor sin comillas
+        'metric{pid="1"}',               # sin valor
+        'metric{pid="1"} not-a-number',  # valor no numérico
+    ]
+    for line in malformed:
+        assert parse_line(line) is None, line
+
+
+def test_iter_samples_skips_only_malformed_lines():
+    lines = [
+        "# TYPE power gauge",
+        'power{pid="1"} 10',
+        'power{pid} 20',
+        b'power{pid="3"} 30',
+    ]
+    assert [s.value for s in iter_samples(lines)] == [10.0, 30.0]
+
+
+def test_iter_samples_stops_after_requested_families():
+    def lines():
+        yield 'a{x="1"} 1'
+        yield 'b{x="1"} 2'
+        yield 'b{x="2"} 3'
+        yield 'c{x="1"} 4'
+        raise AssertionError("se leyó más allá de la última familia pedida")
+
+    assert [(s.name, s.value) for s in iter_samples(lines(), families=["b"])] == \
+        [("b", 2.0), ("b", 3.0)]
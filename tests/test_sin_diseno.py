@@ -0,0 +1,251 @@
+import functools
+import math
+import operator
+from collections import Counter
+
+from benchmark.queries.sin_diseno import (Q15_PIPELINE, Q17_PART_FILTER, Q21_PIPELINE,
+                                          Q22_AVG_PIPELINE, Q22_PIPELINE, run_q17)
+
+
+def _bson_order(value):
+    """En el orden BSON null va antes que cualquier número"""
+    return (value is not None, value or 0)
+
+
+# Sólo expresiones (ni etapas ni índices): lo justo para comprobar contra la
+# definición TPC-H la lógica que Q17, Q21 y Q22 meten en expresiones
+OPERATORS = {
+    "$setUnion": lambda *arrays: sorted({item for array in arrays for item in array}),
+    "$add": lambda *values: sum(values),
+    "$and": lambda *values: all(values),
+    "$eq": operator.eq,
+    "$gt": lambda left, right: _bson_order(left) > _bson_order(right),
+    "$lt": operator.lt,
+    "$multiply": lambda *values: math.prod(values),
+    "$divide": operator.truediv,
+    "$sum": lambda *values: sum(values[0] if len(values) == 1 else values),
+    "$size": len,
+    "$first": lambda array: array[0] if array else None,
+    "$ifNull": lambda value, default: default if value is None else value,
+}
+
+
+def _field(node, key):
+    """Como en MongoDB, una ruta sobre un array de documentos da sus valores"""
+    return [item[key] for item in node] if isinstance(node, list) else node[key]
+
+
+def evaluate(expr, variables):
+    """`variables` incluye CURRENT (el documento); "$a.b" y "$$v.b" son rutas"""
+    if isinstance(expr, str) and expr.startswith("$"):
+        name, *path = (expr[2:] if expr.startswith("$$") else "CURRENT." + expr[1:]).split(".")
+        return functools.reduce(_field, path, variables[name])
+    if isinstance(expr, list):
+        return [evaluate(item, variables) for item in expr]
+    if not isinstance(expr, dict):
+        return expr
+    if len(expr) != 1 or not next(iter(expr)).startswith("$"):
+        return {key: evaluate(value, variables) for key, value in expr.items()}
+    (op, args), = expr.items()
+    if op == "$reduce":
+        value = evaluate(args["initialValue"], variables)
+        for item in evaluate(args["input"], variables):
+            value = evaluate(args["in"], dict(variables, this=item, value=value))
+        return value
+    if op in ("$map", "$filter"):
+        name = args.get("as", "this")
+        items = evaluate(args["input"], variables)
+        if op == "$map":
+            return [evaluate(args["in"], dict(variables, **{name: item})) for item in items]
+        return [item for item in items if evaluate(args["cond"], dict(variables, **{name: item}))]
+    if op == "$cond":
+        condition, then, otherwise = args
+        return evaluate(then if evaluate(condition, variables) else otherwise, variables)
+    args = args if isinstance(args, list) else [args]
+    return OPERATORS[op](*evaluate(args, variables))
+
+
+def _line(suppkey, late):
+    return {"l_suppkey": suppkey, "l_commitdate": 10, "l_receiptdate": 11 if late else 9}
+
+
+ORDERS = [
+    # 1 se retrasa dos veces y 2 no: cuentan las dos líneas de 1
+    {"o_orderstatus": "F", "lineitems": [_line(1, True), _line(2, False), _line(1, True)]},
+    # un solo proveedor: no hay l2 de otro proveedor
+    {"o_orderstatus": "F", "lineitems": [_line(3, True), _line(3, True)]},
+    # dos proveedores tardíos: existe l3
+    {"o_orderstatus": "F", "lineitems": [_line(1, True), _line(2, True)]},
+    # 4 tarde una vez y a tiempo otra, 5 a tiempo
+    {"o_orderstatus": "F", "lineitems": [_line(4, True), _line(4, False), _line(5, False)]},
+    # pedido no terminado
+    {"o_orderstatus": "O", "lineitems": [_line(6, True), _line(7, False)]},
+    # nadie se retrasa
+    {"o_orderstatus": "F", "lineitems": [_line(8, False), _line(9, False)]},
+]
+
+
+def _reference(orders):
+    """numwait por proveedor según la definición TPC-H de Q21"""
+    numwait = Counter()
+    for order in orders:
+        if order["o_orderstatus"] != "F":
+            continue
+        lines = order["lineitems"]
+        for l1 in lines:
+            if l1["l_receiptdate"] <= l1["l_commitdate"]:
+                continue
+            others = [l for l in lines if l["l_suppkey"] != l1["l_suppkey"]]
+            if others and not any(l["l_receiptdate"] > l["l_commitdate"] for l in others):
+                numwait[l1["l_suppkey"]] += 1
+    return numwait
+
+
+def test_q21_single_reduce_per_order():
+    reduces = [stage for stage in Q21_PIPELINE
+               if "$project" in stage and "$reduce" in str(stage["$project"])]
+    assert len(reduces) == 1
+    assert "all_lineitems" not in str(Q21_PIPELINE)
+    assert not any("$unwind" in stage for stage in Q21_PIPELINE[:4])
+
+
+def test_q21_matches_tpch_definition():
+    assert Q21_PIPELINE[0] == {"$match": {"o_orderstatus": "F"}}
+    waits = Q21_PIPELINE[1]["$project"]["waits"]
+    keep = Q21_PIPELINE[2]["$match"]["$expr"]
+    numwait = Counter()
+    for order in ORDERS:
+        if order["o_orderstatus"] != "F":
+            continue
+        result = evaluate(waits, {"CURRENT": order})
+        if evaluate(keep, {"CURRENT": {"waits": result}}):
+            numwait[result["late"][0]] += result["numwait"]
+    assert numwait == _reference(ORDERS) == Counter({1: 2, 4: 1})
+
+
+def test_q15_sorts_revenue_groups_instead_of_facet():
+    assert "$facet" not in str(Q15_PIPELINE)
+    operators = [next(iter(stage)) for stage in Q15_PIPELINE]
+    first_group = operators.index("$group")
+    assert operators[first_group:first_group + 4] == ["$group", "$group", "$sort", "$limit"]
+    assert Q15_PIPELINE[first_group + 2] == {"$sort": {"_id": -1}}
+    assert Q15_PIPELINE[first_group + 3] == {"$limit": 1}
+
+
+def test_q15_keeps_every_top_supplier():
+    # Agrupar por ingreso deja los empates del máximo en el mismo documento
+    stages = Q15_PIPELINE[[next(iter(stage)) for stage in Q15_PIPELINE].index("$group") + 1:]
+    assert stages[0] == {"$group": {"_id": "$total_revenue", "suppliers": {"$push": "$_id"}}}
+    assert stages[3] == {"$unwind": "$suppliers"}
+
+
+PARTS = [
+    {"p_partkey": 1, "p_brand": "Brand#23", "p_container": "MED BOX"},
+    {"p_partkey": 2, "p_brand": "Brand#23", "p_container": "MED BOX"},
+    {"p_partkey": 3, "p_brand": "Brand#12", "p_container": "MED BOX"},
+]
+
+
+def _item(partkey, quantity, price):
+    return {"l_partkey": partkey, "l_quantity": quantity, "l_extendedprice": price}
+
+
+# Media de la parte 1: 13 (umbral 2.6, la línea de 5 queda fuera); de la 2:
+# 26 (umbral 5.2); la 3 no es candidata aunque tenga cantidades pequeñas
+Q17_ORDERS = [
+    {"lineitems": [_item(1, 1, 100.0), _item(3, 1, 999.0), _item(1, 10, 500.0)]},
+    {"lineitems": [_item(1, 20, 700.0), _item(2, 2, 40.0), _item(1, 5, 250.0)]},
+    {"lineitems": [_item(1, 29, 900.0), _item(2, 50, 300.0), _item(3, 100, 999.0)]},
+]
+
+
+def _q17_reference(parts, orders):
+    """sum(l_extendedprice) / 7 de las líneas con l_quantity < 0.2 · media de su parte"""
+    candidates = {p["p_partkey"] for p in parts
+                  if all(p[field] == value for field, value in Q17_PART_FILTER.items())}
+    lines = [li for order in orders for li in order["lineitems"] if li["l_partkey"] in candidates]
+    total = 0.0
+    for line in lines:
+        quantities = [li["l_quantity"] for li in lines if li["l_partkey"] == line["l_partkey"]]
+        if line["l_quantity"] < 0.2 * sum(quantities) / len(quantities):
+            total += line["l_extendedprice"]
+    return total / 7.0
+
+
+class _Collection:
+
+    def __init__(self, docs, calls):
+        self.docs = docs
+        self.calls = calls
+
+    def distinct(self, field, query):
+        return [d[field] for d in self.docs if all(d[k] == v for k, v in query.items())]
+
+    def aggregate(self, pipeline, **kwargs):
+        self.calls.append(pipeline)
+        return iter([])
+
+
+class _Database:
+
+    def __init__(self):
+        self.calls = []
+        self.parts_with_suppliers = _Collection(PARTS, self.calls)
+        self.orders_with_lineitems = _Collection(Q17_ORDERS, self.calls)
+
+
+def test_q17_matches_tpch_definition():
+    db = _Database()
+    run_q17(db)
+    pipeline, = db.calls
+    selected = {"$match": {"lineitems.l_partkey": {"$in": [1, 2]}}}
+    assert pipeline[:3] == [selected, {"$unwind": "$lineitems"}, selected]
+
+    # $group por parte: media sobre todas sus líneas y las líneas en un array
+    group = pipeline[3]["$group"]
+    assert group["_id"] == "$lineitems.l_partkey"
+    assert group["avg_quantity"] == {"$avg": "$lineitems.l_quantity"}
+    groups = {}
+    for order in Q17_ORDERS:
+        for line in order["lineitems"]:
+            if line["l_partkey"] in (1, 2):
+                pushed = evaluate(group["lineitems"]["$push"], {"CURRENT": {"lineitems": line}})
+                groups.setdefault(line["l_partkey"], []).append(pushed)
+
+    total = 0.0
+    for lines in groups.values():
+        doc = {"avg_quantity": sum(li["l_quantity"] for li in lines) / len(lines), "lineitems": lines}
+        total += evaluate(pipeline[4]["$project"]["extendedprice"], {"CURRENT": doc})
+    assert pipeline[5] == {"$group": {"_id": None, "total_extendedprice": {"$sum": "$extendedprice"}}}
+    avg_yearly = evaluate(pipeline[6]["$project"]["avg_yearly"],
+                          {"CURRENT": {"total_extendedprice": total}})
+    assert avg_yearly == _q17_reference(PARTS, Q17_ORDERS) == (100.0 + 40.0) / 7.0
+
+
+def _stage(pipeline, alias):
+    """Índice de la etapa $lookup con `as` == alias"""
+    return next(i for i, stage in enumerate(pipeline)
+                if stage.get("$lookup", {}).get("as") == alias)
+
+
+def test_q22_average_is_uncorrelated_and_fails_closed():
+    position = _stage(Q22_PIPELINE, "average")
+    average = Q22_PIPELINE[position]["$lookup"]
+    assert average["pipeline"] is Q22_AVG_PIPELINE
+    assert not {"let", "localField"} & set(average)
+
+    above = Q22_PIPELINE[position + 1]["$match"]["$expr"]
+    assert evaluate(above, {"CURRENT": {"c_acctbal": 6.0, "average": [{"avg_acctbal": 5.0}]}})
+    assert not evaluate(above, {"CURRENT": {"c_acctbal": 4.0, "average": [{"avg_acctbal": 5.0}]}})
+    # Sin media ningún cliente pasa, por grande que sea su saldo
+    assert not evaluate(above, {"CURRENT": {"c_acctbal": 1e12, "average": []}})
+
+
+def test_q22_anti_join_probes_one_order_by_index():
+    position = _stage(Q22_PIPELINE, "customer_orders")
+    orders = Q22_PIPELINE[position]["$lookup"]
+    assert (orders["from"], orders["localField"], orders["foreignField"]) == \
+        ("orders_with_lineitems", "c_custkey", "o_custkey")
+    assert "let" not in orders
+    assert orders["pipeline"][0] == {"$limit": 1}
+    assert Q22_PIPELINE[position + 1] == {"$match": {"customer_orders": {"$size": 0}}}